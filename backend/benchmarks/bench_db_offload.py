@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Concurrent throughput of GET /api/posts with blocking vs thread-pool database calls.
+
+Runs offline against the app in server.py backed by mongomock, with a fixed
+per-call latency injected into the driver to stand in for a network round
+trip. "blocking" runs each driver call inline on the event loop (the old
+behaviour); "offloaded" uses the database thread pool. The read caches and
+request coalescing are off, so every request reaches the database.
+
+    pip install -r requirements-bench.txt
+    python benchmarks/bench_db_offload.py --requests 200 --concurrency 50 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import mongomock
+import pymongo
+
+pymongo.MongoClient = mongomock.MongoClient
+# The benchmarks drive the Mongo storage backend (through mongomock) whatever the environment selects
+os.environ["STORAGE_BACKEND"] = "mongo"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import server  # noqa: E402
+
+
+class SlowCollection:
+    """Delegates to a mongomock collection, sleeping before every call"""
+
+    def __init__(self, collection, latency):
+        self._collection = collection
+        self._latency = latency
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            return attr(*args, **kwargs)
+        return call
+
+
+async def asgi_request(app, method, path, query="", headers=(), body=b""):
+    """Issue one request against an ASGI app in-process; returns (status, response body)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench"), *headers],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    status = None
+    chunks = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def run_load(total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            status, _ = await asgi_request(server.app, "GET", "/api/posts", "limit=10")
+            assert status == 200, status
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - started
+
+
+async def run_inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def seed(collection, count):
+    now = datetime.utcnow()
+    collection.insert_many([
+        {
+            "title": f"Post {i}",
+            "content": "Lorem ipsum " * 50,
+            "excerpt": f"Excerpt {i}",
+            "tags": ["bench"],
+            "category": "Benchmark",
+            "published": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--posts", type=int, default=100)
+    args = parser.parse_args()
+
+    server.read_cache.ttl = 0
+    server.read_cache.coalesce_timeout = 0
+    server.compressed_cache.ttl = 0
+
+    posts = database.db.blog_posts
+    seed(posts.collection, args.posts)
+    posts.collection = SlowCollection(posts.collection, args.latency_ms / 1000)
+
+    offloaded_run_db = database.run_db
+    results = {}
+    for mode in ("blocking", "offloaded"):
+        database.run_db = run_inline if mode == "blocking" else offloaded_run_db
+        elapsed = asyncio.run(run_load(args.requests, args.concurrency))
+        results[mode] = {
+            "requests": args.requests,
+            "seconds": round(elapsed, 3),
+            "requests_per_second": round(args.requests / elapsed, 1),
+        }
+    database.run_db = offloaded_run_db
+
+    results["config"] = {
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "db_threads": database.DB_THREADS,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
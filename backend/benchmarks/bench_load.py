@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Offline load test of the API: throughput and latency percentiles per endpoint.
+
+Runs the app in server.py in-process (ASGI, no sockets) backed by
+mongomock, seeds a synthetic corpus of each requested size and drives
+concurrent load on the post and project list and detail, search,
+taxonomy, homepage, delta sync and upload paths, then on the write paths
+(create, update, bulk, delete). Writes run after the reads and only touch
+a scratch set of posts added for them, so the read numbers always come
+from the seeded corpus. Results are printed (or written) as JSON, one
+entry per corpus size and scenario, so runs from two commits can be
+compared; --baseline does that comparison directly. mongomock is much
+slower than a real server on scans and index upkeep (search and the
+writes especially), so compare runs with each other rather than reading
+the absolute numbers as production capacity.
+
+    pip install -r requirements-bench.txt
+    python benchmarks/bench_load.py --posts 1000,10000 --requests 500 --concurrency 32 --output load.json
+    python benchmarks/bench_load.py --posts 1000,10000 --baseline load.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+# Uploads go to a scratch directory, never the real UPLOAD_DIR; it is passed
+# through the environment so the image worker processes (which re-import
+# this module) use the same one
+if "BENCH_SCRATCH_DIR" not in os.environ:
+    os.environ["BENCH_SCRATCH_DIR"] = tempfile.mkdtemp(prefix="bench-load-")
+os.environ["UPLOAD_DIR"] = os.environ["BENCH_SCRATCH_DIR"]
+os.environ.setdefault("IMAGE_WORKERS", "1")
+
+from PIL import Image  # noqa: E402
+
+from bench_db_offload import asgi_request, database, server, SlowCollection  # noqa: E402
+import rendering  # noqa: E402
+import search  # noqa: E402
+import taxonomy  # noqa: E402
+
+CATEGORIES = ["Machine Learning", "Python", "Web Development", "DevOps", "Data", "Research", "Tutorials", "News"]
+TAGS = [f"tag{i}" for i in range(60)]
+WORDS = (
+    "python fastapi mongo index query cache latency throughput vector model training inference "
+    "async thread pool cursor document schema search ranking token embedding deploy container "
+    "kubernetes benchmark profile memory allocation network socket stream upload image render"
+).split()
+SEARCH_QUERIES = ["python", "cache latency", "vector model", "kubernetes deploy", "render image", "missingterm"]
+
+# Versions a delta-sync client is behind in the "changes" scenario
+SYNC_BEHIND = 100
+
+# Scenarios that write; they run after the read scenarios, on scratch posts
+WRITE_SCENARIOS = ("create", "update", "bulk", "delete")
+
+# Posts changed by each "bulk" request
+BULK_SIZE = 10
+
+# Throughput or p95 changes within this ratio of the baseline count as noise
+REGRESSION_THRESHOLD = 1.10
+
+
+def make_post(i, rng, now, rendered):
+    words = rng.choices(WORDS, k=300)
+    content = f"## Section {i}\n\n" + " ".join(words[:150]) + "\n\n## Details\n\n" + " ".join(words[150:])
+    created_at = now - timedelta(minutes=i)
+    post = {
+        "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} notes {i}",
+        "content": content,
+        "excerpt": " ".join(words[:20]),
+        "tags": rng.sample(TAGS, 3),
+        "category": rng.choice(CATEGORIES),
+        "featured_image": None,
+        "published": rng.random() < 0.9,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "version": i + 1,
+    }
+    # Rendering every post of a large corpus would dominate seeding, so the
+    # fields of one rendering are shared; only content_hash is per post
+    post.update(rendered, content_hash=rendering.content_hash(content))
+    return post
+
+
+def make_project(i, rng, now):
+    created_at = now - timedelta(hours=i)
+    return {
+        "title": f"Project {i}",
+        "description": " ".join(rng.choices(WORDS, k=40)),
+        "technologies": rng.sample(WORDS, 4),
+        "demo_url": None,
+        "github_url": f"https://example.com/project-{i}",
+        "image_url": None,
+        "featured": i % 5 == 0,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "version": i + 1,
+    }
+
+
+async def seed(size, projects, seed_value):
+    """Replace every collection with a synthetic corpus; returns the post ids.
+
+    Collections are dropped and refilled before their indexes are built
+    (mongomock checks unique indexes with a scan per insert).
+    """
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    for name in database.db.database.list_collection_names():
+        database.db.database.drop_collection(name)
+    server.read_cache.clear()
+    server.compressed_cache.clear()
+
+    rendered = rendering.render_markdown(make_post(0, rng, now, {})["content"])
+    posts = [make_post(i, rng, now, rendered) for i in range(size)]
+    for start in range(0, size, 5000):
+        await database.db.blog_posts.insert_many(posts[start:start + 5000])
+    project_docs = [make_project(i, rng, now) for i in range(projects)]
+    await database.db.ai_projects.insert_many(project_docs)
+
+    postings = [posting for post in posts for posting in search.build_postings(post["_id"], post)]
+    for start in range(0, len(postings), 20000):
+        await database.db.search_terms.insert_many(postings[start:start + 20000])
+    await taxonomy.rebuild_counts()
+    for name, seq in (("blog_posts", size), ("ai_projects", projects)):
+        await database.db.counters.update_one({"_id": name}, {"$set": {"seq": seq, "updated_at": now}}, upsert=True)
+    return [str(post["_id"]) for post in posts], [str(project["_id"]) for project in project_docs]
+
+
+async def seed_scratch(size, count, seed_value):
+    """Add ``count`` posts for the write scenarios, indexed and counted like the corpus; returns their ids"""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    rendered = rendering.render_markdown(make_post(0, rng, now, {})["content"])
+    posts = [dict(make_post(size + i, rng, now, rendered), tags=["scratch", *rng.sample(TAGS, 2)]) for i in range(count)]
+    await database.db.blog_posts.insert_many(posts)
+    # One post at a time, as the create route does (the postings index already exists)
+    for post in posts:
+        await search.index_post(post["_id"], post)
+    await taxonomy.rebuild_counts()
+    server.read_cache.clear()
+    return [str(post["_id"]) for post in posts]
+
+
+def png_body(rng):
+    """A small, unique PNG (unique bytes, so uploads are not deduplicated)"""
+    image = Image.new("RGB", (64, 64), tuple(rng.randrange(256) for _ in range(3)))
+    image.putpixel((rng.randrange(64), rng.randrange(64)), (rng.randrange(256), 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def multipart(fields, file_field, filename, content_type, data):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n".encode() + data + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return f"multipart/form-data; boundary={boundary}", b"".join(parts)
+
+
+def scenarios(post_ids, rng, sync_token, project_ids=(), scratch=None):
+    """name -> function returning the (method, path, query, headers, body) of the next request.
+
+    The write scenarios take their posts from ``scratch`` in turn, so
+    concurrent writes never edit the same post; "delete" removes each id it
+    uses from that list.
+    """
+    ids = post_ids or [str(uuid.uuid4().hex[:24])]
+    projects = list(project_ids) or [str(uuid.uuid4().hex[:24])]
+    scratch = scratch if scratch is not None else []
+    # Writes never fall back to a corpus post: with no scratch left they miss (404)
+    missing = uuid.uuid4().hex[:24]
+    turn = 0
+    gzip = [(b"accept-encoding", b"gzip")]
+    json_body = [(b"content-type", b"application/json")]
+
+    def upload():
+        content_type, body = multipart({"blog_secret": server.BLOG_SECRET}, "file", "bench.png", "image/png", png_body(rng))
+        return "POST", "/api/upload", "", [(b"content-type", content_type.encode())], body
+
+    def post_body():
+        words = rng.choices(WORDS, k=200)
+        return {
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} draft",
+            "content": "## Section\n\n" + " ".join(words),
+            "excerpt": " ".join(words[:20]),
+            "tags": ["scratch", *rng.sample(TAGS, 2)],
+            "category": rng.choice(CATEGORIES),
+            "published": rng.random() < 0.9,
+            "blog_secret": server.BLOG_SECRET,
+        }
+
+    def next_scratch(count):
+        nonlocal turn
+        start, turn = turn, turn + count
+        return [scratch[(start + i) % len(scratch)] for i in range(min(count, len(scratch)))]
+
+    def create():
+        return "POST", "/api/posts", "", json_body, json.dumps(post_body()).encode()
+
+    def update():
+        post_id = (next_scratch(1) or [missing])[0]
+        return "PUT", f"/api/posts/{post_id}", "", json_body, json.dumps(post_body()).encode()
+
+    def bulk():
+        operations = [
+            {"id": post_id, "action": "set", "fields": {"tags": ["scratch", *rng.sample(TAGS, 2)], "published": rng.random() < 0.9}}
+            for post_id in next_scratch(BULK_SIZE)
+        ]
+        body = {"operations": operations, "ordered": False, "blog_secret": server.BLOG_SECRET}
+        return "POST", "/api/posts/bulk", "", json_body, json.dumps(body).encode()
+
+    def delete():
+        post_id = scratch.pop(rng.randrange(len(scratch))) if scratch else missing
+        return "DELETE", f"/api/posts/{post_id}", f"blog_secret={quote(server.BLOG_SECRET)}", [], b""
+
+    return {
+        "list": lambda: ("GET", "/api/posts", f"limit=10&skip={rng.randrange(0, 50, 10)}", [], b""),
+        "list_summary": lambda: ("GET", "/api/posts", "limit=20&summary=true", [], b""),
+        "list_filtered": lambda: ("GET", "/api/posts", f"limit=10&category={rng.choice(CATEGORIES)}", [], b""),
+        "list_gzip": lambda: ("GET", "/api/posts", "limit=50", gzip, b""),
+        "detail": lambda: ("GET", f"/api/posts/{rng.choice(ids)}", "", [], b""),
+        "detail_rendered": lambda: ("GET", f"/api/posts/{rng.choice(ids)}", "rendered=true", [], b""),
+        "search": lambda: ("GET", "/api/search", f"q={rng.choice(SEARCH_QUERIES).replace(' ', '+')}&limit=10", [], b""),
+        "categories": lambda: ("GET", "/api/categories", "", [], b""),
+        "tags": lambda: ("GET", "/api/tags", "published_only=true", [], b""),
+        "home": lambda: ("GET", "/api/home", "limit=3", [], b""),
+        "admin_stats": lambda: ("GET", "/api/admin/stats", "limit=5", [], b""),
+        "changes": lambda: ("GET", "/api/posts/changes", f"since={sync_token}&summary=true", [], b""),
+        "projects": lambda: ("GET", "/api/projects", f"limit=10&skip={rng.randrange(0, 30, 10)}", [], b""),
+        "project_detail": lambda: ("GET", f"/api/projects/{rng.choice(projects)}", "", [], b""),
+        "upload": upload,
+        "create": create,
+        "update": update,
+        "bulk": bulk,
+        "delete": delete,
+    }
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, max(0, int(round(len(samples) * fraction)) - 1))]
+
+
+async def run_scenario(next_request, total, concurrency):
+    """Send ``total`` requests from ``concurrency`` concurrent clients; returns the summary"""
+    latencies = []
+    statuses = {}
+    remaining = total
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, path, query, headers, body = next_request()
+            started = time.perf_counter()
+            status, _ = await asgi_request(server.app, method, path, query, headers, body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": sum(count for status, count in statuses.items() if status is None or status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+async def run(args):
+    results = {}
+    try:
+        for size in args.posts:
+            post_ids, project_ids = await seed(size, args.projects, args.seed)
+            await server.startup_database()
+            # Delta sync from a token that is SYNC_BEHIND writes old
+            sync_token = server.encode_sync_token(max(0, size - SYNC_BEHIND))
+            rng = random.Random(args.seed)
+            scratch = []
+            available = scenarios(post_ids, rng, sync_token, project_ids, scratch)
+            names = args.endpoints or list(available)
+            # Reads first, on the seeded corpus only; then the writes, in WRITE_SCENARIOS order
+            names = [name for name in names if name not in WRITE_SCENARIOS] + [name for name in WRITE_SCENARIOS if name in names]
+            results[str(size)] = {}
+            for name in names:
+                if name in WRITE_SCENARIOS and not scratch:
+                    # Enough for "delete" to remove a different post on every request,
+                    # and for every concurrent "bulk" to change different posts
+                    count = max(min(args.warmup, args.requests) + args.requests, args.concurrency * BULK_SIZE)
+                    scratch.extend(await seed_scratch(size, count, args.seed))
+                next_request = available[name]
+                # Warm up (first-hit caches, lazily built state) outside the measurement
+                await run_scenario(next_request, min(args.warmup, args.requests), args.concurrency)
+                results[str(size)][name] = await run_scenario(next_request, args.requests, args.concurrency)
+                print(f"posts={size} {name}: {results[str(size)][name]['requests_per_second']} req/s", file=sys.stderr)
+            results[str(size)]["_corpus"] = {"posts": size, "projects": args.projects}
+    finally:
+        await server.shutdown_database()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Per size and scenario: current/baseline ratios for throughput and p95, flagging regressions"""
+    comparison = {}
+    for size, runs in results.items():
+        for name, current in runs.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if name.startswith("_") or not previous:
+                continue
+            throughput = current["requests_per_second"] / previous["requests_per_second"]
+            p95 = current["p95_ms"] / previous["p95_ms"] if previous["p95_ms"] else 1.0
+            comparison.setdefault(size, {})[name] = {
+                "throughput_ratio": round(throughput, 3),
+                "p95_ratio": round(p95, 3),
+                "regression": throughput < 1 / REGRESSION_THRESHOLD or p95 > REGRESSION_THRESHOLD,
+            }
+    return comparison
+
+
+def main():
+    try:
+        benchmark()
+    finally:
+        shutil.rmtree(os.environ["BENCH_SCRATCH_DIR"], ignore_errors=True)
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(prog="bench_load.py", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", default="1000", help="comma-separated corpus sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--endpoints", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency injected into every database call")
+    parser.add_argument("--no-cache", action="store_true", help="disable the read and compressed-body caches")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+    args.posts = [int(size) for size in args.posts.split(",")]
+    args.endpoints = args.endpoints.split(",") if args.endpoints else None
+    unknown = set(args.endpoints or []) - set(scenarios([], random.Random(), ""))
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    if args.no_cache:
+        server.read_cache.ttl = 0
+        server.compressed_cache.ttl = 0
+    if args.latency_ms:
+        for name in ("blog_posts", "ai_projects", "search_terms", "taxonomy_counts", "counters", "tombstones", "uploads"):
+            collection = database.db[name]
+            collection.collection = SlowCollection(collection.collection, args.latency_ms / 1000)
+
+    report = {
+        "config": {
+            "posts": args.posts,
+            "projects": args.projects,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "cache": not args.no_cache,
+            "seed": args.seed,
+        },
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "results": asyncio.run(run(args)),
+    }
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            report["comparison"] = compare(report["results"], json.load(baseline))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
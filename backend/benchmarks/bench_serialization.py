@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint cost of turning stored documents into response bytes.
+
+"before" is the previous path: build a Pydantic response model per item
+by hand, then let FastAPI validate and serialize it again against the
+route's response_model and encode it with the stdlib json module.
+"after" is the current one: the shared document mapper plus orjson via
+render(). Only serialization is timed; the documents are built in memory.
+
+    pip install -r requirements-bench.txt
+    python benchmarks/bench_serialization.py --iterations 200 --sizes 10,50,100
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from typing import List, Union
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from bench_db_offload import server
+
+
+def make_post(i):
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "title": f"Post {i}",
+        "content": "Lorem ipsum dolor sit amet. " * 200,
+        "excerpt": f"Excerpt for post {i}",
+        "tags": ["python", "fastapi", "bench"],
+        "category": "Benchmark",
+        "featured_image": None,
+        "published": True,
+        "created_at": now,
+        "updated_at": now,
+        "word_count": 1000,
+        "reading_time": 5,
+        "version": i,
+    }
+
+
+def make_project(i):
+    project = make_post(i)
+    project.update(description=f"Project {i}", technologies=["python"], demo_url=None,
+                   github_url="https://example.com/repo", image_url=None, featured=False)
+    return project
+
+
+def fastapi_path(adapter, value):
+    """What FastAPI does with a returned model: validate, dump to JSON-able data, json.dumps"""
+    content = adapter.dump_python(adapter.validate_python(value), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def before_list(model, adapter, docs):
+    items = []
+    for doc in docs:
+        fields = {name: doc.get(name) for name in model.model_fields if name != "id"}
+        items.append(model(id=str(doc["_id"]), **fields))
+    return fastapi_path(adapter, items)
+
+
+def endpoints(sizes):
+    posts_adapter = TypeAdapter(List[Union[server.BlogPostResponse, server.BlogPostSummary, server.BlogPostFields]])
+    projects_adapter = TypeAdapter(List[Union[server.AIProjectResponse, server.AIProjectSummary, server.AIProjectFields]])
+    post_adapter = TypeAdapter(server.BlogPostResponse)
+    search_adapter = TypeAdapter(server.SearchResponse)
+
+    single = make_post(0)
+    yield "GET /api/posts/{id}", (
+        lambda: fastapi_path(post_adapter, server.BlogPostResponse(id=str(single["_id"]), **{
+            name: single[name] for name in server.BlogPostResponse.model_fields if name != "id"})),
+        lambda: server.render(server.post_response(single)).body,
+    )
+    for size in sizes:
+        posts = [make_post(i) for i in range(size)]
+        projects = [make_project(i) for i in range(size)]
+        yield f"GET /api/posts?limit={size}", (
+            lambda: before_list(server.BlogPostResponse, posts_adapter, posts),
+            lambda: server.render([server.post_response(post) for post in posts]).body,
+        )
+        yield f"GET /api/posts?limit={size}&summary=true", (
+            lambda: before_list(server.BlogPostSummary, posts_adapter, posts),
+            lambda: server.render([server.post_summary(post) for post in posts]).body,
+        )
+        yield f"GET /api/projects?limit={size}", (
+            lambda: before_list(server.AIProjectResponse, projects_adapter, projects),
+            lambda: server.render([server.project_response(project) for project in projects]).body,
+        )
+        yield f"GET /api/search (limit={size})", (
+            lambda: fastapi_path(search_adapter, server.SearchResponse(query="q", total=size, results=[
+                server.SearchHit(id=str(post["_id"]), score=1.0, **{
+                    name: post[name] for name in server.BlogPostSummary.model_fields if name != "id"})
+                for post in posts])),
+            lambda: server.render({"query": "q", "total": size, "results": [
+                dict(server.post_summary(post), score=1.0) for post in posts]}).body,
+        )
+
+
+def measure(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.mean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sizes", default="10,50,100")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {}
+    for name, (before, after) in endpoints(sizes):
+        results[name] = {"before": measure(before, args.iterations), "after": measure(after, args.iterations)}
+        results[name]["speedup"] = round(results[name]["before"]["mean_ms"] / results[name]["after"]["mean_ms"], 1)
+    results["config"] = {"iterations": args.iterations, "sizes": sizes}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
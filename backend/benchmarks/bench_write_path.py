@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Latency and database round trips of the post write endpoints.
+
+Drives POST /api/posts, PUT /api/posts/{id} and DELETE /api/posts/{id}
+through the app in server.py in-process (ASGI, no sockets, as
+bench_load.py does) backed by mongomock, one request at a time, with a
+fixed per-call latency injected into every collection to stand in for a
+network round trip. Besides the latency percentiles it reports the driver
+calls each request makes, per collection: the version counter
+(begin_write and end_write), the post itself, search postings, taxonomy
+counts, tombstones and upload references. Each run creates its own posts,
+updates them and deletes them again.
+
+    pip install -r requirements-bench.txt
+    python benchmarks/bench_write_path.py --iterations 200 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from urllib.parse import quote
+
+from bench_db_offload import asgi_request, database, server, SlowCollection
+
+COLLECTIONS = ("blog_posts", "counters", "search_terms", "taxonomy_counts", "tombstones", "uploads")
+WORDS = "python fastapi mongo index query cache latency throughput cursor document schema search".split()
+
+
+class CountingCollection(SlowCollection):
+    """SlowCollection that also counts the calls made through it, in ``calls[name]``"""
+
+    def __init__(self, collection, latency, calls, name):
+        super().__init__(collection, latency)
+        self._calls = calls
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = super().__getattr__(name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._calls[self._name] += 1
+            return attr(*args, **kwargs)
+        return call
+
+
+def post_body(rng):
+    words = rng.choices(WORDS, k=200)
+    return json.dumps({
+        "title": f"{rng.choice(WORDS).title()} notes",
+        "content": "## Section\n\n" + " ".join(words),
+        "excerpt": " ".join(words[:20]),
+        "tags": rng.sample(WORDS, 3),
+        "category": "Benchmark",
+        "published": True,
+        "blog_secret": server.BLOG_SECRET,
+    }).encode()
+
+
+async def measure(requests, calls):
+    """Send each (method, path, query, body) in turn; returns the summary and the response bodies"""
+    samples = []
+    bodies = []
+    before = Counter(calls)
+    for method, path, query, body in requests:
+        headers = [(b"content-type", b"application/json")] if body else []
+        started = time.perf_counter()
+        status, response = await asgi_request(server.app, method, path, query, headers, body)
+        samples.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            raise RuntimeError(f"{method} {path}: {status} {response[:200]!r}")
+        bodies.append(json.loads(response))
+    samples.sort()
+    round_trips = {name: round((calls[name] - before[name]) / len(samples), 2) for name in COLLECTIONS}
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "round_trips": sum(round_trips.values()),
+        "round_trips_by_collection": {name: count for name, count in round_trips.items() if count},
+    }, bodies
+
+
+async def run(iterations, calls):
+    rng = random.Random(1)
+    await server.startup_database()
+    try:
+        # Warm up (index creation, lazily built state) outside the measurement
+        await measure([("POST", "/api/posts", "", post_body(rng))], calls)
+        results = {}
+        results["create"], created = await measure(
+            [("POST", "/api/posts", "", post_body(rng)) for _ in range(iterations)], calls,
+        )
+        ids = [post["id"] for post in created]
+        results["update"], _ = await measure(
+            [("PUT", f"/api/posts/{post_id}", "", post_body(rng)) for post_id in ids], calls,
+        )
+        secret = f"blog_secret={quote(server.BLOG_SECRET)}"
+        results["delete"], _ = await measure(
+            [("DELETE", f"/api/posts/{post_id}", secret, b"") for post_id in ids], calls,
+        )
+        return results
+    finally:
+        await server.shutdown_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    calls = Counter()
+    for name in COLLECTIONS:
+        collection = database.db[name]
+        collection.collection = CountingCollection(collection.collection, args.latency_ms / 1000, calls, name)
+    results = asyncio.run(run(args.iterations, calls))
+    results["config"] = {"iterations": args.iterations, "latency_ms": args.latency_ms}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, defaultdict
+
+# Read cache settings: entry count bound and time-to-live in seconds (0 disables caching)
+READ_CACHE_MAXSIZE = int(os.environ.get('READ_CACHE_MAXSIZE', '1024'))
+READ_CACHE_TTL = float(os.environ.get('READ_CACHE_TTL', '60'))
+
+# How long (seconds) a request waits on an identical load already in flight
+# before failing with TimeoutError; 0 turns request coalescing off
+READ_COALESCE_TIMEOUT = float(os.environ.get('READ_COALESCE_TIMEOUT', '15'))
+
+
+class ReadCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Every entry is stored under one or more tags (e.g. "posts" for all post
+    lists, "post:<id>" for one post). Write handlers call invalidate() with
+    the tags they affect, which drops exactly those entries. A per-tag
+    generation counter stops a load that was already in flight when its tag
+    was invalidated from storing a stale result.
+
+    Misses are coalesced: concurrent get_or_load() calls for the same key
+    share one in-flight load, even when caching itself is disabled.
+
+    ``on_invalidate``, when set, is called with the tags of every local
+    invalidate() so other worker processes can drop the same entries.
+    """
+
+    def __init__(self, maxsize=READ_CACHE_MAXSIZE, ttl=READ_CACHE_TTL, coalesce_timeout=READ_COALESCE_TIMEOUT):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.coalesce_timeout = coalesce_timeout
+        self._entries = OrderedDict()
+        self._tag_keys = defaultdict(set)
+        self._generations = defaultdict(int)
+        self._inflight = {}
+        self.on_invalidate = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+        self.coalesce_timeouts = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key):
+        """Return (True, value) for a live entry, else (False, None)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, tags, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, key, value, tags, generations=None):
+        """Store a value, unless one of its tags was invalidated since ``generations`` was taken"""
+        if not self.enabled:
+            return
+        if generations is not None and generations != self.generations(tags):
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, tuple(tags), value)
+        for tag in tags:
+            self._tag_keys[tag].add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def generations(self, tags):
+        return tuple(self._generations[tag] for tag in tags)
+
+    async def get_or_load(self, key, tags, loader):
+        """Return the cached value for key, or await loader() and cache its result (unless None).
+
+        The first miss runs loader() as a task; identical misses arriving
+        while it runs await that same task for up to coalesce_timeout
+        seconds and get its result or its exception. A load belongs to the
+        tag generations it started under, so requests arriving after an
+        invalidation start a fresh one instead of joining a stale load.
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+        generations = self.generations(tags)
+        if self.coalesce_timeout <= 0:
+            value = await loader()
+            if value is not None:
+                self.set(key, value, tags, generations)
+            return value
+
+        flight = (key, generations)
+        task = self._inflight.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(self._load(flight, tags, loader))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[flight] = task
+        else:
+            self.coalesced += 1
+        try:
+            # shield: a caller that times out or disconnects leaves the load running for the others
+            return await asyncio.wait_for(asyncio.shield(task), self.coalesce_timeout)
+        except asyncio.TimeoutError:
+            self.coalesce_timeouts += 1
+            raise
+
+    async def _load(self, flight, tags, loader):
+        key, generations = flight
+        try:
+            value = await loader()
+        finally:
+            del self._inflight[flight]
+        if value is not None:
+            self.set(key, value, tags, generations)
+        return value
+
+    def invalidate(self, *tags, propagate=True):
+        """Drop every entry stored under any of the given tags (propagate=False for invalidations from other workers)"""
+        if propagate and self.on_invalidate is not None and tags:
+            self.on_invalidate(tags)
+        for tag in tags:
+            self._generations[tag] += 1
+            for key in list(self._tag_keys.pop(tag, ())):
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._tag_keys.clear()
+        for tag in list(self._generations):
+            self._generations[tag] += 1
+
+    def _remove(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "coalesce_timeouts": self.coalesce_timeouts,
+        }
+
+
+def _retrieve_exception(task):
+    # A failed load nobody is waiting on any more must not log "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+read_cache = ReadCache()
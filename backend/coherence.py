@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+
+from repository import repo
+
+logger = logging.getLogger(__name__)
+
+# Directory where every worker process binds a datagram socket to hear about
+# the other workers' cache invalidations. The multi-worker launchers set it;
+# unset (a single process) turns the channel off.
+CACHE_SYNC_DIR = os.environ.get('CACHE_SYNC_DIR')
+
+# Seconds between checks of the shared version counters, the backstop for a
+# dropped notification or a write made on another host (0 disables polling)
+CACHE_SYNC_INTERVAL = float(os.environ.get('CACHE_SYNC_INTERVAL', '2'))
+
+# Cache tags covering everything read from each collection ("post:*" is on
+# every single-post entry, next to its own "post:<id>")
+COLLECTION_TAGS = {
+    "blog_posts": ("posts", "taxonomy", "post:*"),
+    "ai_projects": ("projects", "project:*"),
+}
+
+# Tags per notification, keeping each datagram well below the socket buffer size
+TAGS_PER_MESSAGE = 256
+
+
+class CacheSync:
+    """Keeps a ReadCache coherent across the worker processes of one server.
+
+    Every local invalidation is sent as a datagram to each sibling worker's
+    socket in CACHE_SYNC_DIR, and datagrams received are applied without
+    being sent on again. Independently, the per-collection version counters
+    every write advances are polled, and everything cached from a collection
+    whose counter moved is dropped. That coarse backstop catches a dropped
+    datagram (the channel never blocks a request) and writes from other hosts.
+    """
+
+    def __init__(self, cache, directory=CACHE_SYNC_DIR, interval=CACHE_SYNC_INTERVAL):
+        self.cache = cache
+        self.directory = directory
+        self.interval = interval
+        self.path = None
+        self._socket = None
+        self._poller = None
+        self._versions = {}
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.polled_invalidations = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.path = os.path.join(self.directory, f"{os.getpid()}.sock")
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+            self._socket.bind(self.path)
+            loop.add_reader(self._socket.fileno(), self._receive)
+            self.cache.on_invalidate = self.publish
+        if self.interval > 0 and self.directory:
+            for collection in COLLECTION_TAGS:
+                self._versions[collection] = (await repo.collection_version(collection))["seq"]
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        if self._socket is not None:
+            self.cache.on_invalidate = None
+            asyncio.get_running_loop().remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def publish(self, tags):
+        """Send tags to every other worker; a full or vanished peer is skipped, never waited for"""
+        tags = list(tags)
+        messages = [json.dumps(tags[start:start + TAGS_PER_MESSAGE]).encode() for start in range(0, len(tags), TAGS_PER_MESSAGE)]
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if not name.endswith(".sock") or peer == self.path:
+                continue
+            for message in messages:
+                try:
+                    self._socket.sendto(message, peer)
+                    self.sent += 1
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a worker that died without cleaning up
+                    try:
+                        os.unlink(peer)
+                    except FileNotFoundError:
+                        pass
+                    break
+                except OSError:
+                    # Peer's queue is full: its version poll will catch up
+                    self.dropped += 1
+
+    def _receive(self):
+        while True:
+            try:
+                message = self._socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                tags = json.loads(message)
+            except ValueError:
+                continue
+            self.received += 1
+            self.cache.invalidate(*tags, propagate=False)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_versions()
+            except Exception as exc:
+                logger.warning("Cache version check failed: %s", exc)
+
+    async def check_versions(self):
+        """Drop the cached reads of every collection written to since the last check"""
+        for collection, tags in COLLECTION_TAGS.items():
+            seq = (await repo.collection_version(collection))["seq"]
+            if seq != self._versions.get(collection, seq):
+                self.cache.invalidate(*tags, propagate=False)
+                self.polled_invalidations += 1
+            self._versions[collection] = seq
+
+    def stats(self):
+        return {
+            "enabled": self._socket is not None,
+            "interval": self.interval if self._poller is not None else 0,
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.dropped,
+            "polled_invalidations": self.polled_invalidations,
+        }
@@ -0,0 +1,132 @@
+import gzip
+import os
+
+from cache import READ_CACHE_TTL, ReadCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this (bytes) are sent as-is; compression levels for
+# gzip (1-9) and brotli (0-11); entries kept in the compressed-body cache
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+COMPRESSION_CACHE_MAXSIZE = int(os.environ.get('COMPRESSION_CACHE_MAXSIZE', '512'))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Compressed bodies of versioned responses, keyed by (ETag, encoding, length)
+compressed_cache = ReadCache(maxsize=COMPRESSION_CACHE_MAXSIZE, ttl=READ_CACHE_TTL)
+
+
+def supported_encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encoding):
+    """Pick the first of supported_encodings() the client accepts with a non-zero q"""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = next((param[2:] for param in params if param.startswith("q=")), "1")
+        try:
+            accepted[coding.lower()] = float(quality)
+        except ValueError:
+            continue
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli compression of text and JSON responses.
+
+    Responses are compressed when their content type is compressible, they
+    are at least COMPRESSION_MIN_SIZE bytes and the client's
+    Accept-Encoding allows it (brotli preferred). Responses that carry a
+    strong ETag are versioned representations (cached reads), so their
+    compressed bytes are kept in compressed_cache and reused while the ETag
+    stays the same instead of compressing the same post on every hit. The
+    ETag is weakened on compressed responses, which the conditional-GET
+    check already accepts. File responses sent with pathsend pass through.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), None)
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                length = headers.get(b"content-length")
+                if (b"content-encoding" in headers or message["status"] in (204, 304)
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or (length is not None and int(length) < self.minimum_size)):
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            message, start = start, None
+            if len(body) < self.minimum_size:
+                await send(message)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            headers = [(name, value) for name, value in message["headers"] if name.lower() not in (b"content-length", b"etag", b"vary")]
+            etag = next((value for name, value in message["headers"] if name.lower() == b"etag"), None)
+            vary = [value for name, value in message["headers"] if name.lower() == b"vary"] + [b"Accept-Encoding"]
+            if etag is not None and not etag.startswith(b"W/"):
+                key = (etag, encoding, len(body))
+                found, compressed = compressed_cache.get(key)
+                if not found:
+                    compressed = compress(body, encoding)
+                    compressed_cache.set(key, compressed, ["compressed"])
+                headers.append((b"etag", b"W/" + etag))
+            else:
+                compressed = compress(body, encoding)
+                if etag is not None:
+                    headers.append((b"etag", etag))
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b", ".join(vary)),
+            ]
+            await send({**message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,134 @@
+import os
+
+from pymongo import MongoClient, ReturnDocument
+
+from executor import DB_OPERATION_TIMEOUT, DB_THREADS, run_db, shutdown_executor  # noqa: F401
+from metrics import mongo_listener
+
+# Environment variables
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'portfolio_blog')
+
+# Connection pool and timeout settings (milliseconds unless noted)
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '20'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '10000'))
+
+
+def create_client():
+    """A client that opens no connections or monitor threads until its first operation"""
+    return MongoClient(
+        MONGO_URL,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        event_listeners=[mongo_listener],
+        connect=False,
+    )
+
+
+client = create_client()
+
+
+class AsyncCollection:
+    """Awaitable wrapper around a pymongo collection.
+
+    Every method runs the synchronous driver call (including cursor
+    iteration) in the database thread pool, so a slow query never blocks
+    the event loop. Cursor-returning methods are materialized into lists.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    @property
+    def name(self):
+        return self.collection.name
+
+    async def find(self, filter=None, projection=None, sort=None, skip=0, limit=0):
+        def _find():
+            cursor = self.collection.find(filter or {}, projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if skip:
+                cursor = cursor.skip(skip)
+            if limit:
+                cursor = cursor.limit(limit)
+            return list(cursor)
+        return await run_db(_find)
+
+    async def find_one(self, filter=None, projection=None):
+        return await run_db(self.collection.find_one, filter or {}, projection)
+
+    async def insert_one(self, document):
+        return await run_db(self.collection.insert_one, document)
+
+    async def update_one(self, filter, update, upsert=False):
+        return await run_db(self.collection.update_one, filter, update, upsert=upsert)
+
+    async def delete_one(self, filter):
+        return await run_db(self.collection.delete_one, filter)
+
+    async def find_one_and_update(self, filter, update, projection=None, upsert=False,
+                                  return_document=ReturnDocument.AFTER):
+        return await run_db(self.collection.find_one_and_update, filter, update, projection,
+                            upsert=upsert, return_document=return_document)
+
+    async def find_one_and_delete(self, filter, projection=None):
+        return await run_db(self.collection.find_one_and_delete, filter, projection)
+
+    async def bulk_write(self, requests, ordered=True):
+        return await run_db(self.collection.bulk_write, requests, ordered=ordered)
+
+    async def insert_many(self, documents, ordered=True):
+        return await run_db(self.collection.insert_many, documents, ordered=ordered)
+
+    async def delete_many(self, filter):
+        return await run_db(self.collection.delete_many, filter)
+
+    async def distinct(self, key, filter=None):
+        return await run_db(self.collection.distinct, key, filter)
+
+    async def count_documents(self, filter, **kwargs):
+        return await run_db(self.collection.count_documents, filter, **kwargs)
+
+    async def estimated_document_count(self):
+        return await run_db(self.collection.estimated_document_count)
+
+    async def aggregate(self, pipeline):
+        return await run_db(lambda: list(self.collection.aggregate(pipeline)))
+
+
+class AsyncDatabase:
+    """Attribute access to AsyncCollection wrappers, mirroring pymongo's Database"""
+
+    def __init__(self, database):
+        self.database = database
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = AsyncCollection(self.database[name])
+        return self._collections[name]
+
+
+db = AsyncDatabase(client[MONGO_DB_NAME])
+
+
+def _reconnect_after_fork():
+    # A forked worker (e.g. gunicorn with preload_app) must not share the parent's
+    # sockets and monitor threads, so it gets a client of its own
+    global client
+    client = create_client()
+    db.database = client[MONGO_DB_NAME]
+    db._collections.clear()
+
+
+os.register_at_fork(after_in_child=_reconnect_after_fork)
@@ -0,0 +1,42 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Worker threads used to run blocking database calls off the event loop, and the
+# overall time (seconds) a route waits for one database call before giving up
+DB_THREADS = int(os.environ.get('DB_THREADS', os.environ.get('MONGO_MAX_POOL_SIZE', '20')))
+DB_OPERATION_TIMEOUT = float(os.environ.get('DB_OPERATION_TIMEOUT', '15'))
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+    return _executor
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database call in the database thread pool and await it"""
+    loop = asyncio.get_running_loop()
+    call = partial(func, *args, **kwargs)
+    return await asyncio.wait_for(loop.run_in_executor(_get_executor(), call), timeout=DB_OPERATION_TIMEOUT)
+
+
+def _reset_after_fork():
+    # Threads do not survive fork; a forked worker starts its own pool on first use
+    global _executor
+    _executor = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def shutdown_executor():
+    """Stop the database thread pool, waiting for in-flight calls to finish"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,75 @@
+"""
+Production serving: gunicorn supervising uvicorn workers.
+
+    pip install -r requirements.txt
+    gunicorn -c gunicorn.conf.py server:app
+
+WEB_CONCURRENCY workers (default: one per CPU core) share the listening
+socket. The master never imports the app: storage is prepared once per
+start or reload in a short-lived subprocess, and each forked worker then
+imports server.py and creates its own database client and thread pool.
+Workers exchange cache invalidations through sockets in CACHE_SYNC_DIR.
+
+Signals to the master: HUP starts new workers on the current code and
+gracefully stops the old ones (a zero-downtime deploy), TERM drains and
+stops, TTIN/TTOU add or remove a worker.
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+chdir = BACKEND_DIR
+
+# Seconds a stopping worker gets to finish in-flight requests, and the
+# heartbeat timeout after which a stuck worker is killed and replaced
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.environ.get('WORKER_TIMEOUT', '60'))
+
+# Recycle each worker after this many requests (0: never), staggered by the jitter
+max_requests = int(os.environ.get('MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Workers must import the app themselves, after fork
+preload_app = False
+
+# Workers only serve; storage is prepared by prepare_storage() below
+raw_env = ["STARTUP_PREPARE=0"]
+
+# This file runs in the master, again on every reload: the pid keeps the
+# directory the same for old and new workers
+_own_sync_dir = not os.environ.get('CACHE_SYNC_DIR')
+_sync_dir = os.environ.get('CACHE_SYNC_DIR') or os.path.join(tempfile.gettempdir(), f"blog-cache-sync-{os.getpid()}")
+os.makedirs(_sync_dir, mode=0o700, exist_ok=True)
+raw_env.append(f"CACHE_SYNC_DIR={_sync_dir}")
+
+
+def prepare_storage(server):
+    """Create the schema/indexes and run the one-time backfills once, outside the master process"""
+    server.log.info("Preparing storage")
+    subprocess.run(
+        [sys.executable, "-c", "import asyncio, server; asyncio.run(server.prepare_storage())"],
+        cwd=BACKEND_DIR, check=True,
+    )
+
+
+def on_starting(server):
+    prepare_storage(server)
+
+
+def on_reload(server):
+    # New code may bring a new renderer version or index manifest
+    prepare_storage(server)
+
+
+def on_exit(server):
+    if _own_sync_dir:
+        shutil.rmtree(_sync_dir, ignore_errors=True)
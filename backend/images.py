@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+from uploads import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+# Responsive widths (px) generated for every uploaded image, encoder quality,
+# and the number of worker processes doing the resizing
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,768,1280').split(',')]
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', '80'))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+
+# Seconds a queued image may stay pending before it counts as lost (its
+# process died) and is queued again, and how often a failing image is tried
+IMAGE_VARIANT_TIMEOUT = int(os.environ.get('IMAGE_VARIANT_TIMEOUT', '300'))
+IMAGE_VARIANT_ATTEMPTS = int(os.environ.get('IMAGE_VARIANT_ATTEMPTS', '3'))
+
+VARIANT_DIR = os.path.join(UPLOAD_DIR, "variants")
+
+_pool = None
+_pending = set()
+
+
+# Formats served in place of the original/fallback to clients that accept them
+MODERN_FORMATS = ["webp"] + (["avif"] if "AVIF" in Image.SAVE else [])
+
+
+def variant_formats(has_alpha):
+    """Formats to encode: WebP, AVIF when this Pillow build can write it, and a universal fallback"""
+    return MODERN_FORMATS + ["png" if has_alpha else "jpeg"]
+
+
+def _save(image, path, fmt, quality):
+    options = {"optimize": True} if fmt in ("png", "jpeg") else {}
+    if fmt != "png":
+        options["quality"] = quality
+    if fmt == "jpeg":
+        options["progressive"] = True
+    image.save(path, format=fmt.upper(), **options)
+
+
+def manifest_path(stem):
+    return os.path.join(VARIANT_DIR, f"{stem}.json")
+
+
+def status_path(stem):
+    return os.path.join(VARIANT_DIR, f"{stem}.status.json")
+
+
+def _write_json(path, data):
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+    with open(path + ".part", "w") as handle:
+        json.dump(data, handle)
+    os.replace(path + ".part", path)
+
+
+def generate_variants(source_path, stem, widths=IMAGE_VARIANT_WIDTHS, quality=IMAGE_QUALITY):
+    """Resize and re-encode one image into every width/format pair.
+
+    Runs in a worker process. EXIF orientation is applied to the pixels and
+    all metadata (EXIF, XMP, ICC, comments) is dropped. Widths larger than
+    the original are skipped (the original width is used if every
+    configured width is larger). Writes the variants and a JSON manifest
+    under VARIANT_DIR and returns the manifest.
+
+    Full-size WebP/AVIF encodings ({stem}.webp, {stem}.avif) are also kept
+    when they come out smaller than the source file, so the /uploads mount
+    can serve them in place of the original.
+    """
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+
+    targets = sorted({width for width in widths if width < image.width}) or [image.width]
+    variants = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in variant_formats(has_alpha):
+            filename = f"{stem}-{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+            _save(resized, os.path.join(VARIANT_DIR, filename), fmt, quality)
+            variants.append({
+                "width": width,
+                "height": height,
+                "format": fmt,
+                "url": f"/uploads/variants/{filename}",
+                "bytes": os.path.getsize(os.path.join(VARIANT_DIR, filename)),
+            })
+
+    source_size = os.path.getsize(source_path)
+    for fmt in MODERN_FORMATS:
+        full_size_path = os.path.join(VARIANT_DIR, f"{stem}.{fmt}")
+        _save(image, full_size_path + ".part", fmt, quality)
+        if os.path.getsize(full_size_path + ".part") < source_size:
+            os.replace(full_size_path + ".part", full_size_path)
+        else:
+            os.remove(full_size_path + ".part")
+
+    manifest = {"source": os.path.basename(source_path), "width": image.width, "height": image.height, "variants": variants}
+    _write_json(manifest_path(stem), manifest)
+    return manifest
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn rather than fork: the parent already runs database threads
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def _run_variants(path, stem, status):
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_get_pool(), generate_variants, os.path.join(UPLOAD_DIR, path), stem)
+    except Exception as exc:
+        # Includes BrokenProcessPool when a worker process dies
+        logger.exception("Could not generate variants for %s", path)
+        status = dict(status, status="failed", error=f"{type(exc).__name__}: {exc}", updated_at=time.time())
+        await asyncio.to_thread(_write_json, status_path(stem), status)
+    else:
+        await asyncio.to_thread(_remove, status_path(stem))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def schedule_variants(path, stem):
+    """Queue variant generation for a stored upload (path relative to UPLOAD_DIR) without waiting for it.
+
+    Progress is kept in {stem}.status.json next to the manifest
+    ({"status": "pending" or "failed", "source", "attempts", "updated_at",
+    "error"}) until the manifest is written.
+    """
+    previous = read_status(stem) or {}
+    status = {"status": "pending", "source": path, "attempts": previous.get("attempts", 0) + 1, "updated_at": time.time(), "error": None}
+    _write_json(status_path(stem), status)
+    task = asyncio.get_running_loop().create_task(_run_variants(path, stem, status))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
+
+
+def read_manifest(stem):
+    """Manifest written by generate_variants, or None while it is still pending"""
+    try:
+        with open(manifest_path(stem)) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def read_status(stem):
+    """Status of an image without a manifest yet (see schedule_variants), or None if it was never queued"""
+    try:
+        with open(status_path(stem)) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def needs_queueing(status):
+    """Whether an image with this status (None: never queued) should be queued again.
+
+    Pending images are left alone for IMAGE_VARIANT_TIMEOUT seconds; failed
+    ones are retried until they have had IMAGE_VARIANT_ATTEMPTS attempts.
+    """
+    if status is None:
+        return True
+    if status["status"] == "pending":
+        return time.time() - status["updated_at"] > IMAGE_VARIANT_TIMEOUT
+    return status["attempts"] < IMAGE_VARIANT_ATTEMPTS
+
+
+def stalled_images():
+    """(source path, stem) of every image whose generation was lost or can be retried"""
+    try:
+        names = os.listdir(VARIANT_DIR)
+    except FileNotFoundError:
+        return []
+    stalled = []
+    for name in names:
+        if name.endswith(".status.json"):
+            stem = name[:-len(".status.json")]
+            status = read_status(stem)
+            if status is not None and needs_queueing(status):
+                stalled.append((status["source"], stem))
+    return stalled
+
+
+def shutdown_pool():
+    """Stop the worker processes, letting queued images finish"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
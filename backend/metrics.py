@@ -0,0 +1,216 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+# Histogram bucket upper bounds (seconds) for HTTP requests and Mongo commands
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """One metric family with a fixed label set; values are kept per label tuple.
+
+    Updates can come from the event loop and from database threads (Mongo
+    command events), so every change is made under a lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _labels(self.labelnames, labels), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_number(value)}" for name, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._observations = {}
+
+    def observe(self, value, *labels):
+        with self._lock:
+            entry = self._observations.get(labels)
+            if entry is None:
+                entry = self._observations[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            observations = {labels: ([*counts], total) for labels, (counts, total) in self._observations.items()}
+        for labels, (counts, total) in sorted(observations.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(self.labelnames, labels, f'le="{_number(bound)}"'), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _labels(self.labelnames, labels), cumulative
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests handled.", ["method", "route", "status"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ["method", "route"])
+IN_FLIGHT = Gauge("http_requests_in_progress", "HTTP requests currently being handled.", ["method", "route"])
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency as seen by the driver.",
+    ["collection", "command"], buckets=MONGO_BUCKETS,
+)
+MONGO_FAILURES = Counter("mongo_command_failures_total", "MongoDB commands that failed.", ["collection", "command"])
+UPLOADS = Counter("uploads_total", "Accepted uploads.", ["result"])
+UPLOAD_BYTES = Counter("upload_bytes_total", "Bytes received in accepted uploads.", ["result"])
+
+REGISTRY = [REQUESTS, REQUEST_LATENCY, IN_FLIGHT, MONGO_LATENCY, MONGO_FAILURES, UPLOADS, UPLOAD_BYTES]
+
+
+def cache_metrics(caches):
+    """Gauge/counter families built at scrape time from ReadCache.stats() of each named cache"""
+    families = {
+        "hits": Counter("read_cache_hits_total", "Cache lookups that found a live entry.", ["cache"]),
+        "misses": Counter("read_cache_misses_total", "Cache lookups that missed.", ["cache"]),
+        "evictions": Counter("read_cache_evictions_total", "Entries evicted by the size bound.", ["cache"]),
+        "expirations": Counter("read_cache_expirations_total", "Entries dropped after their TTL.", ["cache"]),
+        "invalidations": Counter("read_cache_invalidations_total", "Entries dropped by write invalidation.", ["cache"]),
+        "coalesced": Counter("read_cache_coalesced_total", "Misses that joined an identical load already in flight.", ["cache"]),
+        "coalesce_timeouts": Counter("read_cache_coalesce_timeouts_total", "Waits on an in-flight load that timed out.", ["cache"]),
+        "size": Gauge("read_cache_entries", "Entries currently cached.", ["cache"]),
+        "in_flight": Gauge("read_cache_loads_in_flight", "Loads currently running.", ["cache"]),
+    }
+    for cache_name, cache in caches.items():
+        stats = cache.stats()
+        for key, family in families.items():
+            family.inc(cache_name, amount=stats[key])
+    return list(families.values())
+
+
+def render_metrics(caches=None):
+    """All metrics in the Prometheus text exposition format (0.0.4)"""
+    families = REGISTRY + cache_metrics(caches or {})
+    return "\n".join(family.render() for family in families) + "\n"
+
+
+class MetricsMiddleware:
+    """Count, time and track in-flight requests per method and route template.
+
+    The route is resolved the way the router does it, so /api/posts/{post_id}
+    is one series however many posts there are; unmatched paths share the
+    "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def route_for(self, scope):
+        partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_for(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method, route)
+            REQUESTS.inc(method, route, str(status))
+            IN_FLIGHT.dec(method, route)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Driver command-monitoring hook timing every command by collection and name"""
+
+    def __init__(self):
+        self._collections = {}
+
+    @staticmethod
+    def _collection(event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        return target if isinstance(target, str) else ""
+
+    def started(self, event):
+        self._collections[(event.connection_id, event.request_id)] = self._collection(event)
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name)
+        MONGO_FAILURES.inc(collection, event.command_name)
+
+
+mongo_listener = MongoCommandMetrics()
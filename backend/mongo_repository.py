@@ -0,0 +1,387 @@
+import logging
+import os
+import re
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+
+from database import db, run_db
+from repository import TOMBSTONE_TTL_DAYS, Repository, new_epoch, settled_version
+
+logger = logging.getLogger(__name__)
+
+# Create missing indexes at startup (otherwise only report them)
+MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', 'true').lower() == 'true'
+
+# Index manifest: one entry per query shape the routes issue. Equality
+# filters come first and the (created_at, _id) sort keys last, so the
+# planner can walk the index in order instead of sorting in memory and a
+# keyset cursor seeks straight to its position.
+NEWEST_FIRST = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+INDEXES = {
+    "blog_posts": [
+        # /api/posts (published_only=true)
+        {"name": "published_created_at", "keys": [("published", ASCENDING)] + NEWEST_FIRST},
+        # /api/posts?category=... (published_only=true)
+        {"name": "published_category_created_at",
+         "keys": [("published", ASCENDING), ("category", ASCENDING)] + NEWEST_FIRST},
+        # /api/posts?category=...&published_only=false
+        {"name": "category_created_at", "keys": [("category", ASCENDING)] + NEWEST_FIRST},
+        # /api/posts?published_only=false (admin listing)
+        {"name": "created_at", "keys": NEWEST_FIRST},
+        # /api/posts?tag=... (published_only=true), multikey
+        {"name": "published_tags_created_at", "keys": [("published", ASCENDING), ("tags", ASCENDING)] + NEWEST_FIRST},
+        # /api/posts?tag=...&published_only=false and tag lookups, multikey
+        {"name": "tags_created_at", "keys": [("tags", ASCENDING)] + NEWEST_FIRST},
+        # /api/posts/changes
+        {"name": "version", "keys": [("version", ASCENDING)]},
+    ],
+    "ai_projects": [
+        # /api/projects?featured_only=true
+        {"name": "featured_created_at", "keys": [("featured", ASCENDING)] + NEWEST_FIRST},
+        # /api/projects
+        {"name": "created_at", "keys": NEWEST_FIRST},
+        # /api/projects/changes
+        {"name": "version", "keys": [("version", ASCENDING)]},
+    ],
+    "search_terms": [
+        # /api/search: exact and anchored-prefix term lookups
+        {"name": "term_post_id", "keys": [("term", ASCENDING), ("post_id", ASCENDING)], "unique": True},
+        # re-indexing or removing one post
+        {"name": "post_id", "keys": [("post_id", ASCENDING)]},
+    ],
+    "taxonomy_counts": [
+        # one counter per (field, value), upserted by every post write
+        {"name": "field_name", "keys": [("field", ASCENDING), ("name", ASCENDING)], "unique": True},
+    ],
+    "tombstones": [
+        # /api/posts/changes and /api/projects/changes: deletes after a version
+        {"name": "collection_version", "keys": [("collection", ASCENDING), ("version", ASCENDING)]},
+        # expire old tombstones
+        {"name": "deleted_at_ttl", "keys": [("deleted_at", ASCENDING)],
+         "expire_after_seconds": TOMBSTONE_TTL_DAYS * 86400},
+    ],
+    "uploads": [
+        # orphaned uploads (refs <= 0)
+        {"name": "refs", "keys": [("refs", ASCENDING)]},
+    ],
+}
+
+
+def _index_usage(collection):
+    """Return {index name: ops since server start}, or None if $indexStats is unavailable"""
+    try:
+        return {stat["name"]: stat["accesses"]["ops"] for stat in collection.aggregate([{"$indexStats": {}}])}
+    except (OperationFailure, NotImplementedError):
+        return None
+
+
+def ensure_indexes(create=True):
+    """Check every collection in INDEXES against the manifest.
+
+    Missing indexes are created and indexes whose keys no longer match the
+    manifest are rebuilt (when ``create`` is true). Running it again is a
+    no-op. Returns a report per collection listing missing, rebuilt,
+    unexpected and unused indexes.
+    """
+    database = db.database
+    report = {}
+    for collection_name, specs in INDEXES.items():
+        collection = database[collection_name]
+        existing = {
+            name: list(info["key"])
+            for name, info in collection.index_information().items()
+            if name != "_id_"
+        }
+        entry = {"missing": [], "rebuilt": [], "unexpected": [], "unused": []}
+        for spec in specs:
+            keys = [tuple(key) for key in spec["keys"]]
+            current = existing.get(spec["name"])
+            if current is not None and [tuple(key) for key in current] == keys:
+                continue
+            entry["missing" if current is None else "rebuilt"].append(spec["name"])
+            if create:
+                if current is not None:
+                    collection.drop_index(spec["name"])
+                options = {"unique": spec.get("unique", False)}
+                if "expire_after_seconds" in spec:
+                    options["expireAfterSeconds"] = spec["expire_after_seconds"]
+                collection.create_index(keys, name=spec["name"], **options)
+        manifest_names = {spec["name"] for spec in specs}
+        entry["unexpected"] = sorted(set(existing) - manifest_names)
+        usage = _index_usage(collection)
+        if usage is None:
+            entry["unused"] = None
+        else:
+            entry["unused"] = sorted(name for name in manifest_names if usage.get(name, 0) == 0)
+        report[collection_name] = entry
+    return report
+
+
+async def provision_indexes():
+    """Create/verify the index manifest at startup, logging what was found"""
+    try:
+        report = await run_db(ensure_indexes, MONGO_ENSURE_INDEXES)
+    except PyMongoError as exc:
+        logger.warning("Index provisioning skipped: %s", exc)
+        return None
+    for collection_name, entry in report.items():
+        if entry["missing"] or entry["rebuilt"]:
+            action = "created" if MONGO_ENSURE_INDEXES else "missing"
+            logger.info("%s: %s indexes %s", collection_name, action, entry["missing"] + entry["rebuilt"])
+        if entry["unexpected"]:
+            logger.info("%s: indexes not in manifest %s", collection_name, entry["unexpected"])
+    return report
+
+
+def keyset_query(filters, after):
+    """Mongo filter for the documents matching ``filters`` that sort after a (created_at, _id) position"""
+    if after is None:
+        return dict(filters)
+    created_at, last_id = after
+    keyset = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}},
+    ]}
+    return {"$and": [filters, keyset]} if filters else keyset
+
+
+def count_stages(field):
+    """Pipeline stages counting documents per value of a field (unwinding arrays), most used first"""
+    stages = [{"$unwind": f"${field}"}] if field == "tags" else []
+    return stages + [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+    ]
+
+
+def name_counts(rows):
+    return [{"name": row["_id"], "count": row["count"]} for row in rows]
+
+
+def value_counts(rows):
+    """{value: count} from a {"_id": value, "count": n} facet"""
+    return {row["_id"]: row["count"] for row in rows}
+
+
+class MongoRepository(Repository):
+    """Repository over the MongoDB collections of database.db"""
+
+    name = "mongo"
+
+    async def setup(self):
+        await provision_indexes()
+
+    async def index_report(self):
+        return await run_db(ensure_indexes, False)
+
+    async def begin_write(self, collection):
+        # One pipeline update (upserting the counter): the new seq and its
+        # pending entry ({"pending": [{"version", "started_at"}]}) become
+        # visible together. $map evaluates "$seq" after the first stage;
+        # counters from before pending was a list start a new one.
+        now = datetime.utcnow()
+        stamp = await db.counters.find_one_and_update(
+            {"_id": collection},
+            [
+                {"$set": {
+                    "seq": {"$add": [{"$ifNull": ["$seq", 0]}, 1]},
+                    "updated_at": now,
+                    "epoch": {"$ifNull": ["$epoch", new_epoch()]},
+                }},
+                {"$set": {"pending": {"$concatArrays": [
+                    {"$cond": [{"$isArray": "$pending"}, "$pending", []]},
+                    {"$map": {"input": [0], "in": {"version": "$seq", "started_at": now}}},
+                ]}}},
+            ],
+            projection={"seq": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return stamp["seq"]
+
+    async def end_write(self, collection, version):
+        await db.counters.update_one(
+            {"_id": collection},
+            {"$pull": {"pending": {"version": version}}, "$inc": {"seq": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        )
+
+    async def collection_version(self, collection):
+        stamp = await db.counters.find_one({"_id": collection})
+        if stamp is None or "epoch" not in stamp:
+            # First look at this counter (or one from before epochs): give it one
+            stamp = await db.counters.find_one_and_update(
+                {"_id": collection},
+                [{"$set": {"seq": {"$ifNull": ["$seq", 0]}, "epoch": {"$ifNull": ["$epoch", new_epoch()]}}}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            stamp.setdefault("updated_at", None)
+        # Like begin_write, ignores a pending map left from before it was a list
+        entries = stamp.pop("pending", None)
+        pending = {entry["version"]: entry["started_at"] for entry in entries} if isinstance(entries, list) else {}
+        stamp["settled"], stale = settled_version(stamp["seq"], pending)
+        if stale:
+            await db.counters.update_one({"_id": collection}, {"$pull": {"pending": {"version": {"$in": stale}}}})
+        return stamp
+
+    async def find_page(self, collection, filters, projection=None, skip=0, limit=0, after=None):
+        return await db[collection].find(keyset_query(filters, after), projection, sort=NEWEST_FIRST, skip=skip, limit=limit)
+
+    async def count(self, collection, filters):
+        if not filters:
+            return await db[collection].estimated_document_count()
+        return await db[collection].count_documents(filters)
+
+    async def get(self, collection, doc_id, projection=None):
+        return await db[collection].find_one({"_id": doc_id}, projection)
+
+    async def get_many(self, collection, doc_ids, projection=None):
+        return await db[collection].find({"_id": {"$in": list(doc_ids)}}, projection)
+
+    async def changed_since(self, collection, version, projection=None):
+        return await db[collection].find({"version": {"$gt": version}}, projection, sort=[("version", ASCENDING)])
+
+    async def find_stale_renders(self, renderer_version):
+        return await db.blog_posts.find({"renderer_version": {"$ne": renderer_version}}, {"content": 1})
+
+    async def insert(self, collection, doc):
+        return (await db[collection].insert_one(dict(doc))).inserted_id
+
+    async def insert_many(self, collection, docs):
+        if not docs:
+            return []
+        return (await db[collection].insert_many([dict(doc) for doc in docs])).inserted_ids
+
+    async def update(self, collection, doc_id, fields):
+        return await db[collection].find_one_and_update(
+            {"_id": doc_id}, {"$set": fields}, return_document=ReturnDocument.BEFORE
+        )
+
+    async def delete(self, collection, doc_id):
+        return await db[collection].find_one_and_delete({"_id": doc_id})
+
+    async def bulk_write(self, collection, operations, version, ordered=True):
+        # A bulk result only counts matches, so a delete first claims its
+        # document by stamping ``version`` on it and the claimed ones are
+        # removed afterwards. When fewer operations matched than ran, the
+        # documents carrying ``version`` tell which ones found theirs.
+        if not operations:
+            return {}, set()
+        requests = [
+            UpdateOne({"_id": doc_id}, {"$set": {"version": version} if action == "delete" else dict(fields, version=version)})
+            for action, doc_id, fields in operations
+        ]
+        try:
+            matched = (await db[collection].bulk_write(requests, ordered=ordered)).matched_count
+            failed = {}
+        except BulkWriteError as exc:
+            matched = exc.details.get("nMatched", 0)
+            failed = {error["index"]: error.get("errmsg", "Write failed") for error in exc.details.get("writeErrors", [])}
+        ran = [
+            index for index in range(len(operations))
+            if index not in failed and not (ordered and failed and index > min(failed))
+        ]
+        missing = set()
+        if matched < len(ran):
+            found = await db[collection].find({"_id": {"$in": [operations[index][1] for index in ran]}, "version": version}, {"_id": 1})
+            found = {doc["_id"] for doc in found}
+            missing = {index for index in ran if operations[index][1] not in found}
+        claimed = [operations[index][1] for index in ran if operations[index][0] == "delete" and index not in missing]
+        if claimed:
+            await db[collection].delete_many({"_id": {"$in": claimed}})
+        return failed, missing
+
+    async def post_overview(self, published_only, recent, projection):
+        """One $facet aggregation; matching and sorting happen before $facet,
+        so they can use the (published, created_at, _id) / (created_at, _id) indexes."""
+        pipeline = [
+            {"$match": {"published": True} if published_only else {}},
+            {"$sort": dict(NEWEST_FIRST)},
+            {"$facet": {
+                "recent": [{"$limit": recent}, {"$project": projection}],
+                "status": [{"$group": {"_id": "$published", "count": {"$sum": 1}}}],
+                "categories": count_stages("category"),
+                "tags": count_stages("tags"),
+            }},
+        ]
+        facets = (await db.blog_posts.aggregate(pipeline))[0]
+        return {
+            "recent": facets["recent"],
+            "status": value_counts(facets["status"]),
+            "categories": name_counts(facets["categories"]),
+            "tags": name_counts(facets["tags"]),
+        }
+
+    async def project_overview(self, recent, projection):
+        pipeline = [
+            {"$sort": dict(NEWEST_FIRST)},
+            {"$facet": {
+                "recent": [{"$limit": recent}, {"$project": projection}],
+                "featured": [{"$match": {"featured": True}}, {"$limit": recent}, {"$project": projection}],
+                "status": [{"$group": {"_id": "$featured", "count": {"$sum": 1}}}],
+            }},
+        ]
+        facets = (await db.ai_projects.aggregate(pipeline))[0]
+        return {"recent": facets["recent"], "featured": facets["featured"], "status": value_counts(facets["status"])}
+
+    async def record_tombstones(self, collection, doc_ids, version, deleted_at):
+        await db.tombstones.insert_many([
+            {"collection": collection, "doc_id": doc_id, "version": version, "deleted_at": deleted_at}
+            for doc_id in doc_ids
+        ])
+
+    async def deleted_since(self, collection, version):
+        tombstones = await db.tombstones.find({"collection": collection, "version": {"$gt": version}}, {"doc_id": 1})
+        return [tombstone["doc_id"] for tombstone in tombstones]
+
+    async def add_postings(self, postings):
+        if postings:
+            await db.search_terms.insert_many(postings)
+
+    async def remove_postings(self, post_id=None):
+        await db.search_terms.delete_many({} if post_id is None else {"post_id": post_id})
+
+    async def find_postings(self, prefixes, published_only):
+        match = {"$or": [{"term": {"$regex": "^" + re.escape(prefix)}} for prefix in prefixes]}
+        if published_only:
+            match["published"] = True
+        return await db.search_terms.find(match, {"_id": 0, "term": 1, "post_id": 1, "weight": 1})
+
+    async def count_postings(self):
+        return await db.search_terms.estimated_document_count()
+
+    async def increment_counts(self, increments):
+        await db.taxonomy_counts.bulk_write([
+            UpdateOne({"field": field, "name": name}, {"$inc": inc}, upsert=True)
+            for (field, name), inc in increments.items()
+        ], ordered=False)
+
+    async def get_counts(self, field, published_only):
+        query = {"field": field, "published": {"$gt": 0}} if published_only else {"field": field}
+        return await db.taxonomy_counts.find(query, {"_id": 0, "name": 1, "published": 1, "drafts": 1})
+
+    async def replace_counts(self, rows):
+        await db.taxonomy_counts.delete_many({})
+        if rows:
+            await db.taxonomy_counts.insert_many([dict(row) for row in rows])
+
+    async def count_taxonomy_counts(self):
+        return await db.taxonomy_counts.estimated_document_count()
+
+    async def register_upload(self, record):
+        fields = {name: value for name, value in record.items() if name != "_id"}
+        await db.uploads.update_one({"_id": record["_id"]}, {"$setOnInsert": fields}, upsert=True)
+
+    async def get_upload(self, digest):
+        return await db.uploads.find_one({"_id": digest})
+
+    async def adjust_upload_refs(self, deltas):
+        requests = [UpdateOne({"_id": digest}, {"$inc": {"refs": delta}}) for digest, delta in deltas.items() if delta]
+        if requests:
+            await db.uploads.bulk_write(requests, ordered=False)
+
+    async def find_orphan_uploads(self, limit):
+        return await db.uploads.find({"refs": {"$lte": 0}}, sort=[("refs", ASCENDING)], limit=limit)
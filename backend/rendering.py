@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import html
+import math
+import os
+import re
+
+import markdown
+import nh3
+from markdown.extensions.codehilite import CodeHiliteExtension
+from markdown.extensions.toc import TocExtension
+from pygments.formatters import HtmlFormatter
+
+from repository import repo
+
+# Bump whenever the rendering pipeline changes; stored posts rendered by an
+# older version are re-rendered at startup
+RENDERER_VERSION = 1
+
+# Reading speed used for reading_time, and the Pygments theme for code blocks
+READING_WORDS_PER_MINUTE = int(os.environ.get('READING_WORDS_PER_MINUTE', '200'))
+PYGMENTS_STYLE = os.environ.get('PYGMENTS_STYLE', 'monokai')
+
+# Markup the renderer produces (plus raw HTML authors commonly embed);
+# everything else, including scripts, event handlers and inline styles,
+# is stripped
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "code", "dd", "del", "details", "div", "dl", "dt", "em",
+    "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img", "kbd", "li", "mark",
+    "ol", "p", "pre", "s", "span", "strong", "sub", "summary", "sup", "table", "tbody", "td", "tfoot",
+    "th", "thead", "tr", "u", "ul",
+}
+ALLOWED_ATTRIBUTES = {
+    "*": {"class", "id"},
+    "a": {"href", "title"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "td": {"align"},
+    "th": {"align"},
+}
+
+# Fields a rendered post stores next to its markdown source
+RENDERED_FIELDS = ["content_html", "toc", "word_count", "reading_time", "content_hash", "renderer_version"]
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+")
+
+
+def content_hash(content):
+    """Identifies one rendering: the source text and the renderer version that produced it"""
+    return hashlib.sha256(f"{RENDERER_VERSION}:{content}".encode()).hexdigest()[:16]
+
+
+def _toc_entries(tokens):
+    return [
+        {"id": token["id"], "title": html.unescape(token["name"]), "level": token["level"],
+         "children": _toc_entries(token["children"])}
+        for token in tokens
+    ]
+
+
+def render_markdown(content):
+    """Render post markdown to sanitized HTML plus its table of contents and reading stats.
+
+    Code fences are highlighted with Pygments (CSS classes, see
+    highlight_css()), h2-h4 headings get anchor ids and make up the table
+    of contents. Returns a dict with the RENDERED_FIELDS.
+    """
+    converter = markdown.Markdown(extensions=[
+        "fenced_code",
+        "tables",
+        "sane_lists",
+        CodeHiliteExtension(css_class="highlight", guess_lang=False),
+        TocExtension(toc_depth="2-4"),
+    ])
+    rendered = nh3.clean(converter.convert(content or ""), tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+    word_count = len(_WORD_RE.findall(html.unescape(_TAG_RE.sub(" ", rendered))))
+    return {
+        "content_html": rendered,
+        "toc": _toc_entries(converter.toc_tokens),
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / READING_WORDS_PER_MINUTE)),
+        "content_hash": content_hash(content or ""),
+        "renderer_version": RENDERER_VERSION,
+    }
+
+
+def highlight_css():
+    """Stylesheet for the Pygments classes in rendered code blocks"""
+    return HtmlFormatter(style=PYGMENTS_STYLE).get_style_defs(".highlight")
+
+
+async def ensure_rendered():
+    """Render posts stored without HTML or by an older renderer; returns how many were updated"""
+    stale = await repo.find_stale_renders(RENDERER_VERSION)
+    for post in stale:
+        rendered = await asyncio.to_thread(render_markdown, post.get("content"))
+        await repo.update("blog_posts", post["_id"], rendered)
+    return len(stale)
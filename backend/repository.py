@@ -0,0 +1,210 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+# Storage engine behind every route: "mongo" (MongoDB, the default) or
+# "sqlite" (an embedded database file, no external services)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo').lower()
+
+# How long delete tombstones are kept for /changes sync clients
+TOMBSTONE_TTL_DAYS = int(os.environ.get('TOMBSTONE_TTL_DAYS', '30'))
+
+# Seconds after which a write that began but never ended (its process died)
+# no longer holds back the settled version
+PENDING_WRITE_TIMEOUT = int(os.environ.get('PENDING_WRITE_TIMEOUT', '300'))
+
+
+class Repository:
+    """Storage interface the routes and the search/taxonomy/upload modules go through.
+
+    Documents are plain dicts shaped like the Mongo documents the API has
+    always stored: "_id" is an ObjectId, datetimes are naive UTC, tags and
+    technologies are lists. ``collection`` is "blog_posts" or "ai_projects".
+
+    ``filters`` are equality matches ({"published": True, "tags": "python"};
+    a list field matches when it contains the value). ``projection`` uses
+    Mongo's inclusion ({"title": 1}) or exclusion ({"content": 0}) form and
+    may be None for whole documents. Lists come back newest first, ordered
+    by (created_at, _id).
+    """
+
+    name = None
+
+    # Lifecycle
+
+    async def setup(self):
+        """Create or verify the schema and indexes at startup"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release connections at shutdown"""
+
+    async def index_report(self):
+        """{collection or table: {"missing", "rebuilt", "unexpected", "unused"}} without changing anything"""
+        raise NotImplementedError
+
+    # Version stamps (one counter per collection, advanced around every write)
+
+    async def begin_write(self, collection):
+        """Advance a collection's counter and record the new value as a write in flight; returns it"""
+        raise NotImplementedError
+
+    async def end_write(self, collection, version):
+        """Mark a write from begin_write() finished and advance the counter again"""
+        raise NotImplementedError
+
+    async def collection_version(self, collection):
+        """Current stamp: {"seq": int, "updated_at": datetime or None, "settled": int, "epoch": str}.
+
+        ``settled`` is the highest version at or below which every write has
+        ended: ``seq`` when nothing is in flight, else just below the oldest
+        write still in flight (ignoring ones older than PENDING_WRITE_TIMEOUT).
+        ``epoch`` is a random id given to the counter when it is created, so
+        the same ``seq`` in two databases never looks like the same state.
+        """
+        raise NotImplementedError
+
+    # Posts and projects
+
+    async def find_page(self, collection, filters, projection=None, skip=0, limit=0, after=None):
+        """One newest-first page; ``after`` is a (created_at, _id) keyset position to continue from"""
+        raise NotImplementedError
+
+    async def count(self, collection, filters):
+        """Number of documents matching ``filters`` (estimated when unfiltered)"""
+        raise NotImplementedError
+
+    async def get(self, collection, doc_id, projection=None):
+        raise NotImplementedError
+
+    async def get_many(self, collection, doc_ids, projection=None):
+        """Documents with the given ids, in no particular order (missing ids are skipped)"""
+        raise NotImplementedError
+
+    async def changed_since(self, collection, version, projection=None):
+        """Documents whose version is greater than ``version``, oldest write first"""
+        raise NotImplementedError
+
+    async def find_stale_renders(self, renderer_version):
+        """Posts ({"_id", "content"}) not rendered by the given renderer version"""
+        raise NotImplementedError
+
+    async def insert(self, collection, doc):
+        """Store a new document; returns its _id"""
+        raise NotImplementedError
+
+    async def insert_many(self, collection, docs):
+        """Store new documents; returns their _ids"""
+        raise NotImplementedError
+
+    async def update(self, collection, doc_id, fields):
+        """Set fields on one document atomically; returns the document as it was before, or None"""
+        raise NotImplementedError
+
+    async def delete(self, collection, doc_id):
+        """Delete one document; returns it, or None if it did not exist"""
+        raise NotImplementedError
+
+    async def bulk_write(self, collection, operations, version, ordered=True):
+        """Apply [(action, _id, fields)] ("delete" or "set") in one request; sets also store ``version``.
+
+        Returns ({index of a failed operation: error message}, {indexes of
+        operations whose document no longer exists}); an ordered batch stops
+        at its first failure, not at a missing document.
+        """
+        raise NotImplementedError
+
+    async def post_overview(self, published_only, recent, projection):
+        """{"recent": newest posts, "status": {published: count},
+        "categories" / "tags": [{"name", "count"}] most used first}"""
+        raise NotImplementedError
+
+    async def project_overview(self, recent, projection):
+        """{"recent": newest projects, "featured": newest featured ones, "status": {featured: count}}"""
+        raise NotImplementedError
+
+    # Delete tombstones for /changes
+
+    async def record_tombstones(self, collection, doc_ids, version, deleted_at):
+        raise NotImplementedError
+
+    async def deleted_since(self, collection, version):
+        """Ids deleted after ``version``"""
+        raise NotImplementedError
+
+    # Search postings ({"term", "post_id", "weight", "published"})
+
+    async def add_postings(self, postings):
+        raise NotImplementedError
+
+    async def remove_postings(self, post_id=None):
+        """Drop the postings of one post, or of every post when post_id is None"""
+        raise NotImplementedError
+
+    async def find_postings(self, prefixes, published_only):
+        """Postings whose term starts with one of ``prefixes``"""
+        raise NotImplementedError
+
+    async def count_postings(self):
+        raise NotImplementedError
+
+    # Taxonomy counters ({"field", "name", "published", "drafts"})
+
+    async def increment_counts(self, increments):
+        """Apply {(field, name): {"published": delta, "drafts": delta}}, creating missing counters"""
+        raise NotImplementedError
+
+    async def get_counts(self, field, published_only):
+        """Counter rows of one field (only ones with published > 0 when published_only)"""
+        raise NotImplementedError
+
+    async def replace_counts(self, rows):
+        """Replace every counter with ``rows``"""
+        raise NotImplementedError
+
+    async def count_taxonomy_counts(self):
+        raise NotImplementedError
+
+    # Upload records ({"_id": digest, "path", "size", "content_type", "refs", "created_at"})
+
+    async def register_upload(self, record):
+        """Store an upload record unless one with that digest exists"""
+        raise NotImplementedError
+
+    async def get_upload(self, digest):
+        raise NotImplementedError
+
+    async def adjust_upload_refs(self, deltas):
+        """Apply {digest: reference count change}"""
+        raise NotImplementedError
+
+    async def find_orphan_uploads(self, limit):
+        """Upload records with refs <= 0, fewest references first"""
+        raise NotImplementedError
+
+
+def settled_version(seq, pending):
+    """``settled`` for a counter at ``seq`` with writes in flight ({version: started_at}); also returns the stale versions"""
+    cutoff = datetime.utcnow() - timedelta(seconds=PENDING_WRITE_TIMEOUT)
+    live = [int(version) for version, started_at in pending.items() if started_at > cutoff]
+    stale = [int(version) for version, started_at in pending.items() if started_at <= cutoff]
+    return (min(live) - 1 if live else seq), stale
+
+
+def new_epoch():
+    """Identity for a newly created version counter"""
+    return uuid.uuid4().hex
+
+
+def create_repository(backend=STORAGE_BACKEND):
+    """Build the repository for a backend name (the engine's module is only imported when chosen)"""
+    if backend == "mongo":
+        from mongo_repository import MongoRepository
+        return MongoRepository()
+    if backend == "sqlite":
+        from sqlite_repository import SQLiteRepository
+        return SQLiteRepository()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected 'mongo' or 'sqlite')")
+
+
+repo = create_repository()
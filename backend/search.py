@@ -0,0 +1,133 @@
+import math
+import re
+from collections import Counter
+
+from repository import repo
+
+# Relative weight of a term occurrence in each indexed field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.5,
+    "excerpt": 2.0,
+    "content": 1.0,
+}
+
+# Score multiplier for a term that only matches a query token as a prefix
+PREFIX_MATCH_FACTOR = 0.5
+
+MIN_TOKEN_LENGTH = 2
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "if", "in",
+    "into", "is", "it", "its", "of", "on", "or", "so", "that", "the", "their", "then",
+    "there", "these", "this", "to", "was", "were", "will", "with",
+}
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Lowercase word tokens of at least MIN_TOKEN_LENGTH characters, stopwords removed"""
+    return [
+        token for token in _TOKEN_RE.findall((text or "").lower())
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+def build_postings(post_id, post):
+    """Build the search_terms documents for one post.
+
+    Each distinct term gets one posting whose weight sums, over the fields
+    it appears in, the field weight times a log-scaled term frequency.
+    """
+    weights = Counter()
+    for field, field_weight in FIELD_WEIGHTS.items():
+        value = post.get(field)
+        text = " ".join(value) if isinstance(value, list) else value
+        for term, count in Counter(tokenize(text)).items():
+            weights[term] += field_weight * (1 + math.log(count))
+    published = post.get("published", True)
+    return [
+        {"term": term, "post_id": post_id, "weight": round(weight, 4), "published": published}
+        for term, weight in weights.items()
+    ]
+
+
+async def index_post(post_id, post):
+    """Replace the postings of one post with ones built from its current fields"""
+    await repo.remove_postings(post_id)
+    await repo.add_postings(build_postings(post_id, post))
+
+
+async def remove_post(post_id):
+    """Drop every posting of a deleted post"""
+    await repo.remove_postings(post_id)
+
+
+async def rebuild_index():
+    """Re-index every post from scratch; returns the number of posts indexed"""
+    await repo.remove_postings()
+    posts = await repo.find_page("blog_posts", {}, {"title": 1, "excerpt": 1, "content": 1, "tags": 1, "published": 1})
+    for post in posts:
+        await repo.add_postings(build_postings(post["_id"], post))
+    return len(posts)
+
+
+async def ensure_index_built():
+    """Backfill the search index once when posts exist but nothing has been indexed yet"""
+    if await repo.count_postings() == 0 and await repo.count("blog_posts", {}) > 0:
+        await rebuild_index()
+
+
+def rank(tokens, postings, total_posts):
+    """Score posts against the query tokens.
+
+    A post must match every token, either exactly or as a prefix of one of
+    its terms. Each token contributes its best-matching term's weight times
+    that term's inverse document frequency (prefix matches are discounted).
+    Returns [(post_id, score)] ordered by descending score.
+    """
+    document_frequency = Counter(posting["term"] for posting in postings)
+    best = {}
+    for posting in postings:
+        term = posting["term"]
+        idf = math.log(1 + total_posts / document_frequency[term])
+        for token in tokens:
+            if not term.startswith(token):
+                continue
+            score = posting["weight"] * idf * (1.0 if term == token else PREFIX_MATCH_FACTOR)
+            key = (posting["post_id"], token)
+            if score > best.get(key, 0):
+                best[key] = score
+
+    scores = Counter()
+    matched = Counter()
+    for (post_id, _), score in best.items():
+        scores[post_id] += score
+        matched[post_id] += 1
+    ranked = [(post_id, score) for post_id, score in scores.items() if matched[post_id] == len(tokens)]
+    ranked.sort(key=lambda item: (-item[1], str(item[0])))
+    return ranked
+
+
+async def search_posts(query, published_only=True, skip=0, limit=10):
+    """Run a ranked search over the postings index.
+
+    Returns (total matches, [(post document without content, score)]) for
+    the requested page. Only the search_terms index is scanned; the page's
+    posts are then fetched by id.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return 0, []
+
+    postings = await repo.find_postings(tokens, published_only)
+    total_posts = max(await repo.count("blog_posts", {}), 1)
+    ranked = rank(tokens, postings, total_posts)
+
+    page = ranked[skip:skip + limit] if limit else ranked[skip:]
+    if not page:
+        return len(ranked), []
+    posts = await repo.get_many("blog_posts", [post_id for post_id, _ in page], {"content": 0, "content_html": 0, "toc": 0})
+    by_id = {post["_id"]: post for post in posts}
+    return len(ranked), [(by_id[post_id], score) for post_id, score in page if post_id in by_id]
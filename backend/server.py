@@ -1,20 +1,63 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pymongo import MongoClient
+from fastapi.responses import ORJSONResponse
 from bson import ObjectId
-from datetime import datetime
-from typing import Optional, List
+from bson.errors import InvalidId
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import partial
+from typing import Any, Dict, Literal, Optional, List, Union
+import asyncio
+import base64
+import hashlib
+import json
 import os
-import uuid
-from pydantic import BaseModel, Field
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from executor import shutdown_executor
+from repository import TOMBSTONE_TTL_DAYS, repo
+import search
+import rendering
+import taxonomy
+from cache import read_cache
+from coherence import CacheSync
+from compression import CompressionMiddleware, compressed_cache
+import metrics
+import images
+from static_files import UploadStaticFiles
+from uploads import (
+    UPLOAD_DIR, UPLOAD_MAX_BYTES, UnsupportedImage, UploadSizeLimitMiddleware, UploadTooLarge,
+    adjust_refs, find_orphans, save_upload,
+)
 
 # Environment variables
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 BLOG_SECRET = os.environ.get('BLOG_SECRET', 'my-blog-secret-2024')
 
+# Address and worker processes for `python server.py` (gunicorn.conf.py reads the same)
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', '8001'))
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+# Seconds a stopping worker gets to finish in-flight requests
+GRACEFUL_TIMEOUT = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+
+# Whether each process prepares storage at startup; the multi-worker launchers
+# do it once before starting workers and set this to 0 for them
+STARTUP_PREPARE = os.environ.get('STARTUP_PREPARE', '1') == '1'
+
 # Initialize FastAPI app
-app = FastAPI(title="Simple Portfolio Blog API", version="1.0.0")
+app = FastAPI(title="Simple Portfolio Blog API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Compress JSON/text responses for clients that accept gzip/brotli
+app.add_middleware(CompressionMiddleware)
+
+# Reject oversized uploads before their body is read
+app.add_middleware(UploadSizeLimitMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -23,15 +66,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor", "X-Total-Count"],
 )
 
-# MongoDB connection
-client = MongoClient(MONGO_URL)
-db = client.portfolio_blog
+# Request counts, latency and in-flight gauges per route (outermost, so it times everything)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Propagates read_cache invalidations between worker processes
+cache_sync = CacheSync(read_cache)
+
+async def prepare_storage():
+    """Schema, indexes and one-time backfills (search postings, rendered HTML, taxonomy counters)"""
+    await repo.setup()
+    await search.ensure_index_built()
+    await rendering.ensure_rendered()
+    await taxonomy.ensure_counts_built()
+
+@app.on_event("startup")
+async def startup_database():
+    if STARTUP_PREPARE:
+        await prepare_storage()
+    await cache_sync.start()
+    # Images whose variants a previous process never finished
+    for path, stem in await asyncio.to_thread(images.stalled_images):
+        images.schedule_variants(path, stem)
+
+@app.on_event("shutdown")
+async def shutdown_database():
+    await cache_sync.stop()
+    shutdown_executor()
+    await repo.close()
+    images.shutdown_pool()
+
+@app.exception_handler(asyncio.TimeoutError)
+async def database_timeout(request: Request, exc: asyncio.TimeoutError):
+    """A database call, or the wait on an identical one in flight, ran out of time: ask the client to retry"""
+    return ORJSONResponse({"detail": "Database timed out, try again"}, status_code=503, headers={"Retry-After": "1"})
 
 # Create uploads directory
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+app.mount("/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # Pydantic Models
 class BlogPost(BaseModel):
@@ -58,10 +132,10 @@ class AIProject(BaseModel):
     created_at: Optional[datetime] = None
     blog_secret: str  # Secret key for authorization
 
-class BlogPostResponse(BaseModel):
+class BlogPostSummary(BaseModel):
+    """List view of a post: everything except the markdown content"""
     id: str
     title: str
-    content: str
     excerpt: str
     tags: List[str]
     category: str
@@ -69,12 +143,69 @@ class BlogPostResponse(BaseModel):
     published: bool
     created_at: datetime
     updated_at: datetime
+    word_count: Optional[int] = None
+    reading_time: Optional[int] = None  # Minutes
+
+class BlogPostResponse(BlogPostSummary):
+    content: str
+
+class BlogPostRendered(BlogPostResponse):
+    """Single post with its pre-rendered HTML (?rendered=true)"""
+    content_html: str
+    toc: List[Dict[str, Any]]  # [{"id", "title", "level", "children"}]
+
+class BlogPostFields(BaseModel):
+    """Post restricted to the fields requested with ?fields="""
+    id: str
+    title: Optional[str] = None
+    content: Optional[str] = None
+    excerpt: Optional[str] = None
+    tags: Optional[List[str]] = None
+    category: Optional[str] = None
+    featured_image: Optional[str] = None
+    published: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    word_count: Optional[int] = None
+    reading_time: Optional[int] = None
+    content_html: Optional[str] = None
+    toc: Optional[List[Dict[str, Any]]] = None
+
+class SearchHit(BlogPostSummary):
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[SearchHit]
 
-class AIProjectResponse(BaseModel):
+class BulkOperation(BaseModel):
+    id: str
+    action: Literal["delete", "set"]
+    fields: Dict[str, Any] = {}  # Only for "set"
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation]
+    ordered: bool = True  # Stop at the first failing operation
+    blog_secret: str  # Secret key for authorization
+
+class BulkItemResult(BaseModel):
+    id: str
+    action: str
+    status: str  # deleted, updated, not_found, invalid, failed or skipped
+    detail: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    ordered: bool
+    deleted: int
+    updated: int
+    results: List[BulkItemResult]
+
+class AIProjectSummary(BaseModel):
+    """List view of a project: everything except the markdown content"""
     id: str
     title: str
     description: str
-    content: str
     technologies: List[str]
     demo_url: Optional[str]
     github_url: Optional[str]
@@ -82,6 +213,60 @@ class AIProjectResponse(BaseModel):
     featured: bool
     created_at: datetime
 
+class AIProjectResponse(AIProjectSummary):
+    content: str
+
+class AIProjectFields(BaseModel):
+    """Project restricted to the fields requested with ?fields="""
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    technologies: Optional[List[str]] = None
+    demo_url: Optional[str] = None
+    github_url: Optional[str] = None
+    image_url: Optional[str] = None
+    featured: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+# Stored-document defaults for response fields older documents may lack
+POST_DEFAULTS = {"tags": [], "featured_image": None}
+PROJECT_DEFAULTS = {"technologies": [], "featured": False}
+
+def document_mapper(model, defaults: dict):
+    """Build a function turning a stored document into the response dict of a model.
+
+    Fields are copied straight from the document instead of constructing a
+    model instance per item; stored data was validated on write. Handlers
+    return the dicts through render(), which skips response_model
+    validation, so each item is touched once.
+    """
+    names = [name for name in model.model_fields if name != "id"]
+    def to_response(doc: dict) -> dict:
+        item = {"id": str(doc["_id"])}
+        for name in names:
+            item[name] = doc.get(name, defaults.get(name))
+        return item
+    return to_response
+
+post_response = document_mapper(BlogPostResponse, POST_DEFAULTS)
+post_rendered = document_mapper(BlogPostRendered, POST_DEFAULTS)
+post_summary = document_mapper(BlogPostSummary, POST_DEFAULTS)
+project_response = document_mapper(AIProjectResponse, PROJECT_DEFAULTS)
+project_summary = document_mapper(AIProjectSummary, PROJECT_DEFAULTS)
+
+def render(content, response: Optional[Response] = None) -> ORJSONResponse:
+    """Serialize mapped data with orjson, keeping headers already set on the injected response"""
+    return ORJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+def serialize(content) -> bytes:
+    """The body render() would send, for results shared between requests through read_cache"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def render_serialized(body: bytes, response: Optional[Response] = None) -> Response:
+    """Send a body from serialize(), keeping headers already set on the injected response"""
+    return Response(body, media_type="application/json", headers=dict(response.headers) if response is not None else None)
+
 # Utility functions
 def verify_blog_secret(provided_secret: str) -> bool:
     """Verify if the provided secret matches the blog secret"""
@@ -95,52 +280,265 @@ def check_blog_authorization(blog_secret: str):
             detail="Invalid blog secret. You are not authorized to perform this action."
         )
 
+def bson_now() -> datetime:
+    """Current UTC time truncated to the millisecond precision BSON stores"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def encode_cursor(doc: dict) -> str:
+    """Build an opaque cursor token pointing just past the given document"""
+    payload = json.dumps({"t": doc["created_at"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Turn a cursor token back into the (created_at, _id) position it points past"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_object_id(value: str, not_found: str) -> ObjectId:
+    """ObjectId from a path parameter; a malformed id cannot match anything, so it is a 404"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=404, detail=not_found)
+
+def parse_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    """Split a comma-separated ?fields= value, rejecting names the model doesn't have"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+# Stored fields only the single-item view returns (rendered post HTML)
+DETAIL_ONLY = {"content_html": 0, "toc": 0}
+SUMMARY_EXCLUDE = {"content": 0, **DETAIL_ONLY}
+
+def list_projection(names: Optional[List[str]], summary: bool) -> dict:
+    """Repository projection for a list request; created_at is always kept for the cursor"""
+    if names is not None:
+        projection = {name: 1 for name in names if name != "id"}
+        projection["created_at"] = 1
+        return projection
+    return dict(SUMMARY_EXCLUDE if summary else DETAIL_ONLY)
+
+def select_fields(doc: dict, names: List[str], defaults: dict) -> dict:
+    """Pick the requested fields out of a projected document"""
+    selected = {"id": str(doc["_id"])}
+    for name in names:
+        if name != "id":
+            selected[name] = doc.get(name, defaults.get(name))
+    return selected
+
+async def paginate(collection: str, filters: dict, skip: int, limit: int, cursor: Optional[str], projection: Optional[dict] = None):
+    """Fetch one newest-first page by keyset cursor (or skip/limit without one).
+
+    Returns the documents and the X-Total-Count / X-Next-Cursor headers to
+    send with them, so the list body stays unchanged.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None:
+        skip = 0
+    docs, total = await asyncio.gather(
+        repo.find_page(collection, filters, projection, skip=skip, limit=limit, after=after),
+        repo.count(collection, filters),
+    )
+    headers = {"X-Total-Count": str(total)}
+    if limit and len(docs) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+    return docs, headers
+
+async def paginate_serialized(collection: str, filters: dict, skip: int, limit: int, cursor: Optional[str], projection: Optional[dict], to_item):
+    """paginate() with the page mapped through to_item and serialized, so concurrent readers share the bytes"""
+    docs, headers = await paginate(collection, filters, skip, limit, cursor, projection)
+    return serialize([to_item(doc) for doc in docs]), headers
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that identify one representation"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against our validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def conditional(request: Request, response: Response, etag: str, last_modified: Optional[datetime]) -> Optional[Response]:
+    """Return a bodiless 304 if the client's copy is current, else attach the validators to response"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+async def cached_version(collection_name: str, tag: str) -> dict:
+    """Collection version stamp, cached until the next write to that collection"""
+    return await read_cache.get_or_load(("version", collection_name), [tag], lambda: repo.collection_version(collection_name))
+
+def encode_sync_token(version: int) -> str:
+    """Opaque /changes token standing for everything up to a collection version"""
+    payload = json.dumps({"v": version, "t": bson_now().isoformat()})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_sync_token(token: str) -> int:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        version = int(payload["v"])
+        issued_at = datetime.fromisoformat(payload["t"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    if datetime.utcnow() - issued_at > timedelta(days=TOMBSTONE_TTL_DAYS):
+        # Tombstones this old may have expired, so deletes could be missed
+        raise HTTPException(status_code=410, detail="Sync token expired, reload without since")
+    return version
+
+@asynccontextmanager
+async def versioned_write(collection: str, *tags: str):
+    """Take the version a write stamps on its documents and tombstones, and settle it when the block ends.
+
+    Until then /changes tokens stay below it, so a sync that runs while the
+    write is in flight cannot skip it. The read cache entries under ``tags``
+    are dropped when the block ends, also when it fails part way (anything
+    it committed before failing must not be served stale).
+    """
+    version = await repo.begin_write(collection)
+    try:
+        yield version
+    finally:
+        try:
+            await repo.end_write(collection, version)
+        finally:
+            read_cache.invalidate(*tags)
+
+async def record_tombstones(collection_name: str, ids: list, version: int):
+    """Remember deleted ids (at the write's version) for /changes clients"""
+    if ids:
+        await repo.record_tombstones(collection_name, ids, version, bson_now())
+
+async def get_changes(collection: str, since: Optional[str], projection: dict, to_response) -> dict:
+    """Documents written and ids deleted after a sync token (everything when since is None).
+
+    Every write stamps the document (or its tombstone) with the version it
+    took from the collection's counter, so this is an index range scan on
+    version. The returned token is the settled version read before
+    querying: every write at or below it had landed, and writes still in
+    flight come back on the next sync. A document can therefore appear in
+    two consecutive responses; clients apply changes by id.
+    """
+    stamp = await repo.collection_version(collection)
+    if since is None:
+        docs, deleted = await repo.find_page(collection, {}, projection), []
+    else:
+        after = decode_sync_token(since)
+        docs, deleted = await asyncio.gather(
+            repo.changed_since(collection, after, projection),
+            repo.deleted_since(collection, after),
+        )
+    return {
+        "changes": [to_response(doc) for doc in docs],
+        "deleted": [str(doc_id) for doc_id in deleted],
+        "token": encode_sync_token(stamp["settled"]),
+        "full": since is None
+    }
+
+async def load_post(post_id: ObjectId, rendered: bool):
+    """Serialized body, ETag and Last-Modified of one post, or None if it does not exist"""
+    post = await repo.get("blog_posts", post_id)
+    if not post:
+        return None
+    etag = make_etag("post", post["_id"], post.get("version"), post["updated_at"].isoformat(), post.get("content_hash"), rendered)
+    to_response = post_rendered if rendered and "content_html" in post else post_response
+    return serialize(to_response(post)), etag, post["updated_at"]
+
+async def load_project(project_id: ObjectId):
+    """Serialized body, ETag and Last-Modified of one project, or None if it does not exist"""
+    project = await repo.get("ai_projects", project_id)
+    if not project:
+        return None
+    last_modified = project.get("updated_at", project["created_at"])
+    etag = make_etag("project", project["_id"], project.get("version"), last_modified.isoformat())
+    return serialize(project_response(project)), etag, last_modified
+
 # Blog Post Routes
-@app.get("/api/posts", response_model=List[BlogPostResponse])
-async def get_blog_posts(skip: int = 0, limit: int = 10, category: Optional[str] = None, published_only: bool = True):
-    query = {}
+@app.get("/api/posts", response_model=List[Union[BlogPostResponse, BlogPostSummary, BlogPostFields]], response_model_exclude_unset=True)
+async def get_blog_posts(request: Request, response: Response, skip: int = 0, limit: int = 10, category: Optional[str] = None, tag: Optional[str] = None, published_only: bool = True, cursor: Optional[str] = None, summary: bool = False, fields: Optional[str] = None):
+    filters = {}
     if published_only:
-        query["published"] = True
+        filters["published"] = True
     if category:
-        query["category"] = category
-    
-    posts = list(db.blog_posts.find(query).sort("created_at", -1).skip(skip).limit(limit))
-    return [
-        BlogPostResponse(
-            id=str(post["_id"]),
-            title=post["title"],
-            content=post["content"],
-            excerpt=post["excerpt"],
-            tags=post.get("tags", []),
-            category=post["category"],
-            featured_image=post.get("featured_image"),
-            published=post["published"],
-            created_at=post["created_at"],
-            updated_at=post["updated_at"]
-        ) for post in posts
-    ]
-
-@app.get("/api/posts/{post_id}", response_model=BlogPostResponse)
-async def get_blog_post(post_id: str):
-    try:
-        post = db.blog_posts.find_one({"_id": ObjectId(post_id)})
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-        
-        return BlogPostResponse(
-            id=str(post["_id"]),
-            title=post["title"],
-            content=post["content"],
-            excerpt=post["excerpt"],
-            tags=post.get("tags", []),
-            category=post["category"],
-            featured_image=post.get("featured_image"),
-            published=post["published"],
-            created_at=post["created_at"],
-            updated_at=post["updated_at"]
-        )
-    except Exception:
+        filters["category"] = category
+    if tag:
+        filters["tags"] = tag
+    
+    names = parse_fields(fields, BlogPostFields)
+    params = (skip, limit, category, tag, published_only, cursor, summary, fields)
+    stamp = await cached_version("blog_posts", "posts")
+    not_modified = conditional(request, response, make_etag("/api/posts", stamp["epoch"], stamp["seq"], *params), stamp["updated_at"])
+    if not_modified:
+        return not_modified
+    
+    if names is not None:
+        to_response = partial(select_fields, names=names, defaults=POST_DEFAULTS)
+    else:
+        to_response = post_summary if summary else post_response
+    body, headers = await read_cache.get_or_load(
+        ("/api/posts", *params),
+        ["posts"],
+        lambda: paginate_serialized("blog_posts", filters, skip, limit, cursor, list_projection(names, summary), to_response),
+    )
+    response.headers.update(headers)
+    return render_serialized(body, response)
+
+# Delta sync for admin clients: call without since once, then with the returned token
+# (responses may overlap, so apply changes and deletes by id)
+@app.get("/api/posts/changes")
+async def get_blog_post_changes(since: Optional[str] = None, summary: bool = False):
+    changes = await get_changes(
+        "blog_posts", since, list_projection(None, summary), post_summary if summary else post_response
+    )
+    return render(changes)
+
+@app.get("/api/posts/{post_id}", response_model=Union[BlogPostRendered, BlogPostResponse])
+async def get_blog_post(post_id: str, request: Request, response: Response, rendered: bool = False):
+    # Keyed and tagged by the canonical id (ObjectId also accepts upper-case hex),
+    # the form every write invalidates
+    object_id = parse_object_id(post_id, "Post not found")
+    post = await read_cache.get_or_load(
+        ("/api/posts/{post_id}", str(object_id), rendered),
+        [f"post:{object_id}", "post:*"],
+        lambda: load_post(object_id, rendered),
+    )
+    if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    
+    body, etag, last_modified = post
+    not_modified = conditional(request, response, etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    return render_serialized(body, response)
 
 @app.post("/api/posts", response_model=BlogPostResponse)
 async def create_blog_post(post: BlogPost):
@@ -150,121 +548,250 @@ async def create_blog_post(post: BlogPost):
     post_doc = post.dict()
     # Remove blog_secret from stored data
     del post_doc["blog_secret"]
-    post_doc["created_at"] = datetime.utcnow()
-    post_doc["updated_at"] = datetime.utcnow()
-    
-    result = db.blog_posts.insert_one(post_doc)
-    
-    # Retrieve the created post
-    created_post = db.blog_posts.find_one({"_id": result.inserted_id})
-    return BlogPostResponse(
-        id=str(created_post["_id"]),
-        title=created_post["title"],
-        content=created_post["content"],
-        excerpt=created_post["excerpt"],
-        tags=created_post.get("tags", []),
-        category=created_post["category"],
-        featured_image=created_post.get("featured_image"),
-        published=created_post["published"],
-        created_at=created_post["created_at"],
-        updated_at=created_post["updated_at"]
-    )
+    post_doc["created_at"] = post_doc["updated_at"] = bson_now()
+    # Render the markdown once here so readers never pay for it
+    post_doc.update(await asyncio.to_thread(rendering.render_markdown, post_doc["content"]))
+    async with versioned_write("blog_posts", "posts", "taxonomy") as version:
+        post_doc["version"] = version
+        
+        post_id = await repo.insert("blog_posts", post_doc)
+        await search.index_post(post_id, post_doc)
+        await taxonomy.apply_counts(None, post_doc)
+        await adjust_refs(None, post_doc)
+    
+    # The stored document is exactly what we sent; no need to read it back
+    created_post = dict(post_doc, _id=post_id)
+    return render(post_response(created_post))
 
 @app.put("/api/posts/{post_id}", response_model=BlogPostResponse)
 async def update_blog_post(post_id: str, post: BlogPost):
     # Check authorization
     check_blog_authorization(post.blog_secret)
     
-    try:
-        post_doc = post.dict()
-        # Remove blog_secret from stored data
-        del post_doc["blog_secret"]
-        # Remove created_at to avoid overwriting it
-        if "created_at" in post_doc:
-            del post_doc["created_at"]
-        post_doc["updated_at"] = datetime.utcnow()
+    object_id = parse_object_id(post_id, "Post not found")
+    post_doc = post.dict()
+    # Remove blog_secret from stored data
+    del post_doc["blog_secret"]
+    # Remove created_at to avoid overwriting it
+    if "created_at" in post_doc:
+        del post_doc["created_at"]
+    post_doc["updated_at"] = bson_now()
+    post_doc.update(await asyncio.to_thread(rendering.render_markdown, post_doc["content"]))
+    async with versioned_write("blog_posts", "posts", f"post:{object_id}", "taxonomy") as version:
+        post_doc["version"] = version
         
-        result = db.blog_posts.update_one(
-            {"_id": ObjectId(post_id)}, 
-            {"$set": post_doc}
-        )
+        # Update in one atomic round trip, getting the previous version back;
+        # the new one is that plus the fields we just set
+        old_post = await repo.update("blog_posts", object_id, post_doc)
         
-        if result.matched_count == 0:
+        if old_post is None:
             raise HTTPException(status_code=404, detail="Post not found")
-        
-        updated_post = db.blog_posts.find_one({"_id": ObjectId(post_id)})
-        return BlogPostResponse(
-            id=str(updated_post["_id"]),
-            title=updated_post["title"],
-            content=updated_post["content"],
-            excerpt=updated_post["excerpt"],
-            tags=updated_post.get("tags", []),
-            category=updated_post["category"],
-            featured_image=updated_post.get("featured_image"),
-            published=updated_post["published"],
-            created_at=updated_post["created_at"],
-            updated_at=updated_post["updated_at"]
-        )
-    except Exception:
-        raise HTTPException(status_code=404, detail="Post not found")
+        updated_post = {**old_post, **post_doc}
+        await search.index_post(object_id, post_doc)
+        await taxonomy.apply_counts(old_post, updated_post)
+        await adjust_refs(old_post, updated_post)
+    
+    return render(post_response(updated_post))
 
 @app.delete("/api/posts/{post_id}")
 async def delete_blog_post(post_id: str, blog_secret: str):
     # Check authorization
     check_blog_authorization(blog_secret)
     
-    try:
-        result = db.blog_posts.delete_one({"_id": ObjectId(post_id)})
-        if result.deleted_count == 0:
+    object_id = parse_object_id(post_id, "Post not found")
+    async with versioned_write("blog_posts", "posts", f"post:{object_id}", "taxonomy") as version:
+        deleted_post = await repo.delete("blog_posts", object_id)
+        if deleted_post is None:
             raise HTTPException(status_code=404, detail="Post not found")
-        return {"message": "Post deleted successfully"}
-    except Exception:
-        raise HTTPException(status_code=404, detail="Post not found")
+        await record_tombstones("blog_posts", [deleted_post["_id"]], version)
+        await search.remove_post(object_id)
+        await taxonomy.apply_counts(deleted_post, None)
+        await adjust_refs(deleted_post, None)
+    return {"message": "Post deleted successfully"}
+
+# Bulk mutations
+BULK_MAX_OPERATIONS = int(os.environ.get('BULK_MAX_OPERATIONS', '500'))
+BULK_READONLY_FIELDS = {"blog_secret", "created_at", "updated_at"}
+
+def validate_bulk_fields(model, fields: dict) -> dict:
+    """Type-check a "set" operation against the fields of the write model"""
+    if not fields:
+        raise ValueError("No fields to set")
+    unknown = [name for name in fields if name not in model.model_fields or name in BULK_READONLY_FIELDS]
+    if unknown:
+        raise ValueError(f"Cannot set fields: {', '.join(unknown)}")
+    return {
+        name: TypeAdapter(model.model_fields[name].annotation).validate_python(value)
+        for name, value in fields.items()
+    }
+
+async def run_bulk(collection: str, model, batch: BulkRequest, tags: tuple, item_tag: str, prepare=None):
+    """Validate and run a batch of delete/set operations as one bulk write.
+
+    ``tags``, and ``item_tag:<id>`` for each id in the batch, are the read
+    cache entries to drop when the write ends. ``prepare``, if given, is awaited with each validated "set" and returns
+    the fields to actually write (e.g. adding derived fields). An id may
+    appear once per batch; repeats are invalid, since each applied operation
+    is paired with the document as read before the batch. Returns the
+    per-item response plus the applied operations as (action, document
+    before the write, fields set) so the caller can update derived data.
+    """
+    if len(batch.operations) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_OPERATIONS} operations per request")
+    
+    results = [BulkItemResult(id=op.id, action=op.action, status="skipped") for op in batch.operations]
+    planned = []  # (position, ObjectId, fields)
+    seen = set()
+    for position, op in enumerate(batch.operations):
+        try:
+            oid = ObjectId(op.id)
+            if oid in seen:
+                raise ValueError(f"Id {op.id} appears more than once in this batch")
+            fields = validate_bulk_fields(model, op.fields) if op.action == "set" else None
+            if fields is not None and prepare is not None:
+                fields = await prepare(fields)
+            planned.append((position, oid, fields))
+            seen.add(oid)
+        except (InvalidId, TypeError, ValueError, ValidationError) as exc:
+            results[position].status = "invalid"
+            results[position].detail = str(exc)
+            if batch.ordered:
+                break
+    
+    existing = {}
+    if planned:
+        docs = await repo.get_many(collection, [oid for _, oid, _ in planned])
+        existing = {doc["_id"]: doc for doc in docs}
+    
+    async with versioned_write(collection, *tags, *(f"{item_tag}:{oid}" for _, oid, _ in planned)) as version:
+        now = bson_now()
+        operations, sent = [], []
+        for position, oid, fields in planned:
+            if oid not in existing:
+                results[position].status = "not_found"
+                if batch.ordered:
+                    break
+                continue
+            if fields is None:
+                operations.append(("delete", oid, None))
+            else:
+                operations.append(("set", oid, {**fields, "updated_at": now, "version": version}))
+            sent.append((position, oid, fields))
+        
+        failed, missing = await repo.bulk_write(collection, operations, version, ordered=batch.ordered)
+        
+        applied = []
+        first_failure = min(failed) if failed else None
+        for index, (position, oid, fields) in enumerate(sent):
+            if index in missing:
+                # Deleted after it was read above: nothing was written, so no derived writes either
+                results[position].status = "not_found"
+            elif index in failed:
+                results[position].status = "failed"
+                results[position].detail = failed[index]
+            elif batch.ordered and first_failure is not None and index > first_failure:
+                continue
+            else:
+                results[position].status = "deleted" if fields is None else "updated"
+                applied.append((results[position].status, existing[oid], fields))
+        await record_tombstones(collection, [old["_id"] for status, old, _ in applied if status == "deleted"], version)
+    
+    response = BulkResponse(
+        ordered=batch.ordered,
+        deleted=sum(1 for result in results if result.status == "deleted"),
+        updated=sum(1 for result in results if result.status == "updated"),
+        results=results,
+    )
+    return response, applied
+
+async def render_post_fields(fields: dict) -> dict:
+    """Re-render the stored HTML when a bulk "set" changes a post's content"""
+    if "content" not in fields:
+        return fields
+    return {**fields, **await asyncio.to_thread(rendering.render_markdown, fields["content"])}
+
+@app.post("/api/posts/bulk", response_model=BulkResponse)
+async def bulk_blog_posts(batch: BulkRequest):
+    # Check authorization once for the whole batch
+    check_blog_authorization(batch.blog_secret)
+    
+    response, applied = await run_bulk("blog_posts", BlogPost, batch, ("posts", "taxonomy"), "post", prepare=render_post_fields)
+    try:
+        for status, old_post, fields in applied:
+            new_post = None if status == "deleted" else {**old_post, **fields}
+            if new_post is None:
+                await search.remove_post(old_post["_id"])
+            elif set(fields) & (set(search.FIELD_WEIGHTS) | {"published"}):
+                await search.index_post(old_post["_id"], new_post)
+            await taxonomy.apply_counts(old_post, new_post)
+            await adjust_refs(old_post, new_post)
+    finally:
+        # The derived data changed after run_bulk dropped the cache
+        read_cache.invalidate("posts", "taxonomy")
+    return response
+
+# Search route
+@app.get("/api/search", response_model=SearchResponse)
+async def search_blog_posts(q: str, skip: int = 0, limit: int = 10, published_only: bool = True):
+    total, hits = await search.search_posts(q, published_only, skip, limit)
+    return render({
+        "query": q,
+        "total": total,
+        "results": [dict(post_summary(post), score=round(score, 4)) for post, score in hits]
+    })
 
 # AI Projects Routes
-@app.get("/api/projects", response_model=List[AIProjectResponse])
-async def get_ai_projects(skip: int = 0, limit: int = 10, featured_only: bool = False):
-    query = {}
+@app.get("/api/projects", response_model=List[Union[AIProjectResponse, AIProjectSummary, AIProjectFields]], response_model_exclude_unset=True)
+async def get_ai_projects(request: Request, response: Response, skip: int = 0, limit: int = 10, featured_only: bool = False, cursor: Optional[str] = None, summary: bool = False, fields: Optional[str] = None):
+    filters = {}
     if featured_only:
-        query["featured"] = True
-    
-    projects = list(db.ai_projects.find(query).sort("created_at", -1).skip(skip).limit(limit))
-    return [
-        AIProjectResponse(
-            id=str(project["_id"]),
-            title=project["title"],
-            description=project["description"],
-            content=project["content"],
-            technologies=project.get("technologies", []),
-            demo_url=project.get("demo_url"),
-            github_url=project.get("github_url"),
-            image_url=project.get("image_url"),
-            featured=project.get("featured", False),
-            created_at=project["created_at"]
-        ) for project in projects
-    ]
+        filters["featured"] = True
+    
+    names = parse_fields(fields, AIProjectFields)
+    params = (skip, limit, featured_only, cursor, summary, fields)
+    stamp = await cached_version("ai_projects", "projects")
+    not_modified = conditional(request, response, make_etag("/api/projects", stamp["epoch"], stamp["seq"], *params), stamp["updated_at"])
+    if not_modified:
+        return not_modified
+    
+    if names is not None:
+        to_response = partial(select_fields, names=names, defaults=PROJECT_DEFAULTS)
+    else:
+        to_response = project_summary if summary else project_response
+    body, headers = await read_cache.get_or_load(
+        ("/api/projects", *params),
+        ["projects"],
+        lambda: paginate_serialized("ai_projects", filters, skip, limit, cursor, list_projection(names, summary), to_response),
+    )
+    response.headers.update(headers)
+    return render_serialized(body, response)
+
+# Delta sync for admin clients: call without since once, then with the returned token
+# (responses may overlap, so apply changes and deletes by id)
+@app.get("/api/projects/changes")
+async def get_ai_project_changes(since: Optional[str] = None, summary: bool = False):
+    changes = await get_changes(
+        "ai_projects", since, list_projection(None, summary), project_summary if summary else project_response
+    )
+    return render(changes)
 
 @app.get("/api/projects/{project_id}", response_model=AIProjectResponse)
-async def get_ai_project(project_id: str):
-    try:
-        project = db.ai_projects.find_one({"_id": ObjectId(project_id)})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        return AIProjectResponse(
-            id=str(project["_id"]),
-            title=project["title"],
-            description=project["description"],
-            content=project["content"],
-            technologies=project.get("technologies", []),
-            demo_url=project.get("demo_url"),
-            github_url=project.get("github_url"),
-            image_url=project.get("image_url"),
-            featured=project.get("featured", False),
-            created_at=project["created_at"]
-        )
-    except Exception:
+async def get_ai_project(project_id: str, request: Request, response: Response):
+    object_id = parse_object_id(project_id, "Project not found")
+    project = await read_cache.get_or_load(
+        ("/api/projects/{project_id}", str(object_id)),
+        [f"project:{object_id}", "project:*"],
+        lambda: load_project(object_id),
+    )
+    if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    
+    body, etag, last_modified = project
+    not_modified = conditional(request, response, etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    return render_serialized(body, response)
 
 @app.post("/api/projects", response_model=AIProjectResponse)
 async def create_ai_project(project: AIProject):
@@ -274,73 +801,67 @@ async def create_ai_project(project: AIProject):
     project_doc = project.dict()
     # Remove blog_secret from stored data
     del project_doc["blog_secret"]
-    project_doc["created_at"] = datetime.utcnow()
-    
-    result = db.ai_projects.insert_one(project_doc)
-    
-    created_project = db.ai_projects.find_one({"_id": result.inserted_id})
-    return AIProjectResponse(
-        id=str(created_project["_id"]),
-        title=created_project["title"],
-        description=created_project["description"],
-        content=created_project["content"],
-        technologies=created_project.get("technologies", []),
-        demo_url=created_project.get("demo_url"),
-        github_url=created_project.get("github_url"),
-        image_url=created_project.get("image_url"),
-        featured=created_project.get("featured", False),
-        created_at=created_project["created_at"]
-    )
+    project_doc["created_at"] = project_doc["updated_at"] = bson_now()
+    async with versioned_write("ai_projects", "projects") as version:
+        project_doc["version"] = version
+        
+        project_id = await repo.insert("ai_projects", project_doc)
+        await adjust_refs(None, project_doc)
+    
+    # The stored document is exactly what we sent; no need to read it back
+    created_project = dict(project_doc, _id=project_id)
+    return render(project_response(created_project))
 
 @app.put("/api/projects/{project_id}", response_model=AIProjectResponse)
 async def update_ai_project(project_id: str, project: AIProject):
     # Check authorization
     check_blog_authorization(project.blog_secret)
     
-    try:
-        project_doc = project.dict()
-        # Remove blog_secret from stored data
-        del project_doc["blog_secret"]
-        # Remove created_at to avoid overwriting it
-        if "created_at" in project_doc:
-            del project_doc["created_at"]
+    object_id = parse_object_id(project_id, "Project not found")
+    project_doc = project.dict()
+    # Remove blog_secret from stored data
+    del project_doc["blog_secret"]
+    # Remove created_at to avoid overwriting it
+    if "created_at" in project_doc:
+        del project_doc["created_at"]
+    project_doc["updated_at"] = bson_now()
+    async with versioned_write("ai_projects", "projects", f"project:{object_id}") as version:
+        project_doc["version"] = version
         
-        result = db.ai_projects.update_one(
-            {"_id": ObjectId(project_id)}, 
-            {"$set": project_doc}
-        )
+        # Update in one atomic round trip, getting the previous version back;
+        # the new one is that plus the fields we just set
+        old_project = await repo.update("ai_projects", object_id, project_doc)
         
-        if result.matched_count == 0:
+        if old_project is None:
             raise HTTPException(status_code=404, detail="Project not found")
-        
-        updated_project = db.ai_projects.find_one({"_id": ObjectId(project_id)})
-        return AIProjectResponse(
-            id=str(updated_project["_id"]),
-            title=updated_project["title"],
-            description=updated_project["description"],
-            content=updated_project["content"],
-            technologies=updated_project.get("technologies", []),
-            demo_url=updated_project.get("demo_url"),
-            github_url=updated_project.get("github_url"),
-            image_url=updated_project.get("image_url"),
-            featured=updated_project.get("featured", False),
-            created_at=updated_project["created_at"]
-        )
-    except Exception:
-        raise HTTPException(status_code=404, detail="Project not found")
+        updated_project = {**old_project, **project_doc}
+        await adjust_refs(old_project, updated_project)
+    
+    return render(project_response(updated_project))
 
 @app.delete("/api/projects/{project_id}")
 async def delete_ai_project(project_id: str, blog_secret: str):
     # Check authorization
     check_blog_authorization(blog_secret)
     
-    try:
-        result = db.ai_projects.delete_one({"_id": ObjectId(project_id)})
-        if result.deleted_count == 0:
+    object_id = parse_object_id(project_id, "Project not found")
+    async with versioned_write("ai_projects", "projects", f"project:{object_id}") as version:
+        deleted_project = await repo.delete("ai_projects", object_id)
+        if deleted_project is None:
             raise HTTPException(status_code=404, detail="Project not found")
-        return {"message": "Project deleted successfully"}
-    except Exception:
-        raise HTTPException(status_code=404, detail="Project not found")
+        await record_tombstones("ai_projects", [deleted_project["_id"]], version)
+        await adjust_refs(deleted_project, None)
+    return {"message": "Project deleted successfully"}
+
+@app.post("/api/projects/bulk", response_model=BulkResponse)
+async def bulk_ai_projects(batch: BulkRequest):
+    # Check authorization once for the whole batch
+    check_blog_authorization(batch.blog_secret)
+    
+    response, applied = await run_bulk("ai_projects", AIProject, batch, ("projects",), "project")
+    for status, old_project, fields in applied:
+        await adjust_refs(old_project, None if status == "deleted" else {**old_project, **fields})
+    return response
 
 # Verification route
 @app.post("/api/verify-secret")
@@ -355,36 +876,182 @@ async def upload_file(file: UploadFile = File(...), blog_secret: str = Form(""))
     # Check authorization
     check_blog_authorization(blog_secret)
     
-    if not file.content_type.startswith("image/"):
+    # Stream to disk; the type comes from the file's magic bytes
+    try:
+        stored = await save_upload(file)
+    except UnsupportedImage:
         raise HTTPException(status_code=400, detail="Only image files are allowed")
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"File too large (max {UPLOAD_MAX_BYTES} bytes)")
+    
+    result = "created" if stored["created"] else "deduplicated"
+    metrics.UPLOADS.inc(result)
+    metrics.UPLOAD_BYTES.inc(result, amount=stored["size"])
     
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = f"uploads/{unique_filename}"
+    # Resized WebP/fallback variants are produced in a worker process,
+    # once per distinct file
+    if stored["created"]:
+        images.schedule_variants(stored["path"], stored["digest"])
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    return {
+        "filename": stored["path"],
+        "url": f"/uploads/{stored['path']}",
+        "variants": f"/api/uploads/{stored['digest']}/variants",
+        "deduplicated": not stored["created"]
+    }
+
+@app.get("/api/uploads/{digest}/variants")
+async def get_upload_variants(digest: str, response: Response):
+    manifest = None
+    if re.fullmatch(r"[0-9a-f]{32,64}", digest):
+        manifest = await asyncio.to_thread(images.read_manifest, digest)
+    if manifest is not None:
+        return {"status": "ready", **manifest}
     
-    return {"filename": unique_filename, "url": f"/uploads/{unique_filename}"}
+    upload = await repo.get_upload(digest)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    status = await asyncio.to_thread(images.read_status, digest)
+    # Never queued (or lost with its process), or failed with attempts left: queue it again
+    if images.needs_queueing(status):
+        images.schedule_variants(upload["path"], digest)
+    elif status["status"] == "failed":
+        return {"status": "failed", "error": status["error"], "attempts": status["attempts"], "variants": []}
+    response.status_code = 202
+    return {"status": "pending", "variants": []}
+
+# Orphaned uploads route (protected)
+@app.get("/api/admin/uploads/orphans")
+async def get_orphaned_uploads(blog_secret: str, limit: int = 100):
+    # Check authorization
+    check_blog_authorization(blog_secret)
+    
+    orphans = await find_orphans(limit)
+    return {
+        "orphans": [
+            {
+                "digest": upload["_id"],
+                "url": f"/uploads/{upload['path']}",
+                "size": upload["size"],
+                "refs": upload["refs"],
+                "created_at": upload["created_at"]
+            } for upload in orphans
+        ]
+    }
+
+async def post_overview(published_only: bool, recent: int) -> dict:
+    """Recent posts, published/draft counts and category/tag totals in one repository call"""
+    overview = await repo.post_overview(published_only, recent, SUMMARY_EXCLUDE)
+    total = sum(overview["status"].values())
+    published = overview["status"].get(True, 0)
+    return {
+        "total": total,
+        "published": published,
+        "drafts": total - published,
+        "recent": [post_summary(post) for post in overview["recent"]],
+        "categories": overview["categories"],
+        "tags": overview["tags"],
+    }
+
+async def project_overview(recent: int) -> dict:
+    """Recent and featured projects plus their counts in one repository call"""
+    overview = await repo.project_overview(recent, {"content": 0})
+    return {
+        "total": sum(overview["status"].values()),
+        "featured": overview["status"].get(True, 0),
+        "recent": [project_summary(project) for project in overview["recent"]],
+        "featured_recent": [project_summary(project) for project in overview["featured"]],
+    }
+
+async def load_home(limit: int) -> dict:
+    posts, projects = await asyncio.gather(post_overview(True, limit), project_overview(limit))
+    return {
+        "recent_posts": posts.pop("recent"),
+        "featured_projects": projects.pop("featured_recent"),
+        "posts": {name: posts[name] for name in ("published", "categories", "tags")},
+        "projects": {"total": projects["total"], "featured": projects["featured"]},
+    }
+
+async def load_admin_stats(limit: int) -> dict:
+    posts, projects = await asyncio.gather(post_overview(False, limit), project_overview(limit))
+    projects.pop("featured_recent")
+    return {"posts": posts, "projects": projects}
+
+# Most recent posts/projects /api/home and /api/admin/stats may ask for
+# (each distinct limit is its own cache entry)
+OVERVIEW_MAX_LIMIT = 20
+
+# Homepage route: recent posts, featured projects and totals in one request
+@app.get("/api/home")
+async def get_home(limit: int = Query(3, ge=1, le=OVERVIEW_MAX_LIMIT)):
+    home = await read_cache.get_or_load(("/api/home", limit), ["posts", "projects"], lambda: load_home(limit))
+    return render(home)
+
+# Dashboard statistics route (public, like /api/posts?published_only=false, whose data it summarizes)
+@app.get("/api/admin/stats")
+async def get_admin_stats(limit: int = Query(5, ge=1, le=OVERVIEW_MAX_LIMIT)):
+    stats = await read_cache.get_or_load(("/api/admin/stats", limit), ["posts", "projects"], lambda: load_admin_stats(limit))
+    return render(stats)
 
 # Categories route
 @app.get("/api/categories")
-async def get_categories():
-    categories = db.blog_posts.distinct("category")
-    return {"categories": categories}
+async def get_categories(published_only: bool = False):
+    counts = await read_cache.get_or_load(
+        ("/api/categories", published_only), ["taxonomy"], lambda: taxonomy.get_counts("category", published_only)
+    )
+    return {"categories": [row["name"] for row in counts], "counts": counts}
 
 # Tags route  
 @app.get("/api/tags")
-async def get_tags():
-    posts = db.blog_posts.find({}, {"tags": 1})
-    all_tags = []
-    for post in posts:
-        all_tags.extend(post.get("tags", []))
-    unique_tags = list(set(all_tags))
-    return {"tags": unique_tags}
+async def get_tags(published_only: bool = False):
+    counts = await read_cache.get_or_load(
+        ("/api/tags", published_only), ["taxonomy"], lambda: taxonomy.get_counts("tags", published_only)
+    )
+    return {"tags": [row["name"] for row in counts], "counts": counts}
+
+# Taxonomy counter rebuild route (protected)
+@app.post("/api/admin/taxonomy/rebuild")
+async def rebuild_taxonomy(blog_secret: str):
+    # Check authorization
+    check_blog_authorization(blog_secret)
+    
+    rebuilt = await taxonomy.rebuild_counts()
+    read_cache.invalidate("taxonomy")
+    return {"counters": rebuilt}
+
+# Index report route (protected)
+@app.get("/api/admin/indexes")
+async def get_index_report(blog_secret: str):
+    # Check authorization
+    check_blog_authorization(blog_secret)
+    
+    report = await repo.index_report()
+    return {"collections": report}
+
+# Cache statistics route (protected)
+@app.get("/api/admin/cache")
+async def get_cache_stats(blog_secret: str):
+    # Check authorization
+    check_blog_authorization(blog_secret)
+    
+    return {**read_cache.stats(), "compressed": compressed_cache.stats(), "sync": cache_sync.stats()}
+
+# Stylesheet for highlighted code in rendered posts
+@app.get("/api/highlight.css")
+async def get_highlight_css():
+    return Response(
+        rendering.highlight_css(),
+        media_type="text/css",
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
+
+# Prometheus metrics
+@app.get("/api/metrics")
+async def get_metrics():
+    return Response(
+        metrics.render_metrics({"read": read_cache, "compressed": compressed_cache}),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 # Health check
 @app.get("/api/health")
@@ -393,4 +1060,22 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    if WEB_CONCURRENCY > 1:
+        # Several uvicorn workers (fresh processes, each with its own clients):
+        # prepare storage once here, then let the workers share cache
+        # invalidations. gunicorn.conf.py adds graceful restarts on SIGHUP.
+        subprocess.run(
+            [sys.executable, "-c", "import asyncio, server; asyncio.run(server.prepare_storage())"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        )
+        os.environ["STARTUP_PREPARE"] = "0"
+        sync_dir = None
+        if not os.environ.get("CACHE_SYNC_DIR"):
+            sync_dir = os.environ["CACHE_SYNC_DIR"] = tempfile.mkdtemp(prefix="blog-cache-sync-")
+        try:
+            uvicorn.run("server:app", host=HOST, port=PORT, workers=WEB_CONCURRENCY, timeout_graceful_shutdown=GRACEFUL_TIMEOUT)
+        finally:
+            if sync_dir:
+                shutil.rmtree(sync_dir, ignore_errors=True)
+    else:
+        uvicorn.run(app, host=HOST, port=PORT)
\ No newline at end of file
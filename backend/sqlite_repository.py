@@ -0,0 +1,756 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from executor import run_db
+from repository import TOMBSTONE_TTL_DAYS, Repository, new_epoch, settled_version
+
+# Database file, how long (milliseconds) a connection waits for another
+# process's write lock, and prepared statements kept per connection
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'portfolio_blog.db')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_STATEMENT_CACHE = int(os.environ.get('SQLITE_STATEMENT_CACHE', '256'))
+
+# The relational layout of hostinger_deployment/database.sql (posts and
+# projects with their tags / technologies in side tables), plus the
+# columns and tables the API keeps next to them: version stamps, rendered
+# HTML, search postings, taxonomy counters, tombstones and upload records.
+# Ids are ObjectId hex strings, so ids and cursors look the same on both
+# backends; datetimes are naive-UTC ISO strings of a fixed width, so they
+# sort as text.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blog_posts (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    excerpt TEXT,
+    category TEXT DEFAULT 'General',
+    featured_image TEXT DEFAULT NULL,
+    published INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    content_html TEXT,
+    toc TEXT,
+    word_count INTEGER,
+    reading_time INTEGER,
+    content_hash TEXT,
+    renderer_version INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS blog_post_tags (
+    post_id TEXT NOT NULL REFERENCES blog_posts(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (post_id, tag)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ai_projects (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    content TEXT DEFAULT NULL,
+    demo_url TEXT DEFAULT NULL,
+    github_url TEXT DEFAULT NULL,
+    image_url TEXT DEFAULT NULL,
+    featured INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS project_technologies (
+    project_id TEXT NOT NULL REFERENCES ai_projects(id) ON DELETE CASCADE,
+    technology TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (project_id, technology)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    updated_at TEXT,
+    epoch TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pending_writes (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    PRIMARY KEY (name, version)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tombstones (
+    collection TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    deleted_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS search_terms (
+    term TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    weight REAL NOT NULL,
+    published INTEGER NOT NULL,
+    PRIMARY KEY (term, post_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS taxonomy_counts (
+    field TEXT NOT NULL,
+    name TEXT NOT NULL,
+    published INTEGER NOT NULL DEFAULT 0,
+    drafts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (field, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS uploads (
+    digest TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+"""
+
+# Index manifest, the counterpart of mongo_repository.INDEXES: equality
+# columns first, then the (created_at, id) newest-first sort keys
+INDEXES = {
+    # /api/posts (published_only=true)
+    "idx_posts_published_created": "blog_posts (published, created_at DESC, id DESC)",
+    # /api/posts?category=... (published_only=true)
+    "idx_posts_published_category_created": "blog_posts (published, category, created_at DESC, id DESC)",
+    # /api/posts?category=...&published_only=false
+    "idx_posts_category_created": "blog_posts (category, created_at DESC, id DESC)",
+    # /api/posts?published_only=false (admin listing)
+    "idx_posts_created": "blog_posts (created_at DESC, id DESC)",
+    # /api/posts/changes
+    "idx_posts_version": "blog_posts (version)",
+    # /api/posts?tag=... and tag counts
+    "idx_post_tags_tag": "blog_post_tags (tag, post_id)",
+    # /api/projects?featured_only=true
+    "idx_projects_featured_created": "ai_projects (featured, created_at DESC, id DESC)",
+    # /api/projects
+    "idx_projects_created": "ai_projects (created_at DESC, id DESC)",
+    # /api/projects/changes
+    "idx_projects_version": "ai_projects (version)",
+    # /changes: deletes after a version, and expiring old tombstones
+    "idx_tombstones_collection_version": "tombstones (collection, version)",
+    "idx_tombstones_deleted_at": "tombstones (deleted_at)",
+    # re-indexing or removing one post (term lookups use the primary key)
+    "idx_search_terms_post": "search_terms (post_id)",
+    # orphaned uploads (refs <= 0)
+    "idx_uploads_refs": "uploads (refs)",
+}
+
+# Per collection: scalar columns, and the side table holding its list field
+# as (list field, table, owner column, value column)
+COLUMNS = {
+    "blog_posts": [
+        "title", "content", "excerpt", "category", "featured_image", "published", "created_at", "updated_at",
+        "version", "content_html", "toc", "word_count", "reading_time", "content_hash", "renderer_version",
+    ],
+    "ai_projects": [
+        "title", "description", "content", "demo_url", "github_url", "image_url", "featured", "created_at",
+        "updated_at", "version",
+    ],
+}
+LIST_FIELDS = {
+    "blog_posts": ("tags", "blog_post_tags", "post_id", "tag"),
+    "ai_projects": ("technologies", "project_technologies", "project_id", "technology"),
+}
+BOOLEAN_COLUMNS = {"published", "featured"}
+DATETIME_COLUMNS = {"created_at", "updated_at"}
+JSON_COLUMNS = {"toc"}
+
+# Ids bound per statement when fetching by id (below SQLite's variable limit)
+ID_BATCH = 500
+
+
+def _time(value):
+    """Fixed-width text for a datetime (naive UTC), so text order is time order"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _to_column(name, value):
+    if name in DATETIME_COLUMNS:
+        return _time(value)
+    if name in BOOLEAN_COLUMNS:
+        return int(bool(value))
+    if name in JSON_COLUMNS:
+        return json.dumps(value) if value is not None else None
+    return value
+
+
+def _from_column(name, value):
+    if name in DATETIME_COLUMNS:
+        return _parse_time(value)
+    if name in BOOLEAN_COLUMNS:
+        return bool(value)
+    if name in JSON_COLUMNS:
+        return json.loads(value) if value is not None else None
+    return value
+
+
+def _distinct(values):
+    """List values in order without repeats (the side tables hold each value once per document)"""
+    return list(dict.fromkeys(values or []))
+
+
+def _selected(collection, projection):
+    """(scalar columns, include the list field) for a Mongo-style projection"""
+    columns = COLUMNS[collection]
+    list_field = LIST_FIELDS[collection][0]
+    if not projection:
+        return columns, True
+    if any(value for name, value in projection.items() if name != "_id"):
+        included = {name for name, value in projection.items() if value}
+        return [name for name in columns if name in included], list_field in included
+    excluded = {name for name, value in projection.items() if not value}
+    return [name for name in columns if name not in excluded], list_field not in excluded
+
+
+def _select(collection, projection):
+    columns, with_list = _selected(collection, projection)
+    select = ["d.id"] + [f"d.{name}" for name in columns]
+    if with_list:
+        _, table, owner, value = LIST_FIELDS[collection]
+        select.append(
+            f"(SELECT json_group_array({value}) FROM "
+            f"(SELECT {value} FROM {table} WHERE {owner} = d.id ORDER BY position)) AS list_values"
+        )
+    return ", ".join(select), columns, with_list
+
+
+def _where(collection, filters):
+    """SQL conditions and parameters for equality filters (list fields match by membership)"""
+    list_field, table, owner, value = LIST_FIELDS[collection]
+    conditions, params = [], []
+    for name, expected in filters.items():
+        if name == list_field:
+            conditions.append(f"d.id IN (SELECT {owner} FROM {table} WHERE {value} = ?)")
+        elif name in COLUMNS[collection]:
+            conditions.append(f"d.{name} = ?")
+        else:
+            raise ValueError(f"Cannot filter {collection} on {name}")
+        params.append(_to_column(name, expected))
+    return conditions, params
+
+
+class SQLiteRepository(Repository):
+    """Repository over an embedded SQLite database in WAL mode.
+
+    Every call runs in the shared database thread pool on that thread's own
+    connection (readers never block each other or the writer under WAL).
+    Writes take a process-wide lock and an immediate transaction, so each
+    repository call is atomic; a route that makes several calls (the
+    document, then its tombstones, search postings and counters) is not,
+    just as with Mongo. Other processes wait up to SQLITE_BUSY_TIMEOUT_MS
+    for the file lock. All SQL is parameterized and the statements are
+    reused from each connection's prepared-statement cache.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._forget_connections)
+
+    # Connections and transactions
+
+    def _forget_connections(self):
+        # A connection must not be used across fork: a forked worker abandons the
+        # inherited ones (without closing them) and opens its own
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=SQLITE_STATEMENT_CACHE,
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _run(self, func, args, write, snapshot):
+        connection = self._connection()
+        if not (write or snapshot):
+            return func(connection, *args)
+        with self._write_lock if write else nullcontext():
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                result = func(connection, *args)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+
+    async def _read(self, func, *args, snapshot=False):
+        """Run func(connection, *args); ``snapshot`` wraps several statements in one read transaction"""
+        return await run_db(self._run, func, args, False, snapshot)
+
+    async def _write(self, func, *args):
+        """Run func(connection, *args) in one write transaction"""
+        return await run_db(self._run, func, args, True, False)
+
+    # Lifecycle
+
+    def _setup(self):
+        # executescript commits on its own, so this runs outside _write's transaction
+        with self._write_lock:
+            connection = self._connection()
+            connection.executescript(SCHEMA)
+            # Files created before counters had an epoch
+            if "epoch" not in {column["name"] for column in connection.execute("PRAGMA table_info(counters)")}:
+                connection.execute("ALTER TABLE counters ADD COLUMN epoch TEXT")
+            for name, definition in INDEXES.items():
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+            connection.execute("PRAGMA optimize")
+
+    async def setup(self):
+        await run_db(self._setup)
+
+    async def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _index_report(self, connection):
+        existing = {}
+        for row in connection.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"):
+            existing.setdefault(row["tbl_name"], set()).add(row["name"])
+        report = {}
+        for name, definition in INDEXES.items():
+            table = definition.split(" ", 1)[0]
+            entry = report.setdefault(table, {"missing": [], "rebuilt": [], "unexpected": [], "unused": None})
+            if name not in existing.get(table, set()):
+                entry["missing"].append(name)
+        for table, names in existing.items():
+            if table in report:
+                report[table]["unexpected"] = sorted(names - set(INDEXES))
+        return report
+
+    async def index_report(self):
+        return await self._read(self._index_report)
+
+    # Version stamps
+
+    def _bump(self, connection, collection, now):
+        return connection.execute(
+            "INSERT INTO counters (name, seq, updated_at, epoch) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET seq = seq + 1, updated_at = excluded.updated_at, "
+            "epoch = coalesce(epoch, excluded.epoch) RETURNING seq",
+            (collection, _time(now), new_epoch()),
+        ).fetchone()[0]
+
+    async def begin_write(self, collection):
+        def begin(connection):
+            now = datetime.utcnow()
+            version = self._bump(connection, collection, now)
+            connection.execute(
+                "INSERT INTO pending_writes (name, version, started_at) VALUES (?, ?, ?)",
+                (collection, version, _time(now)),
+            )
+            return version
+        return await self._write(begin)
+
+    async def end_write(self, collection, version):
+        def end(connection):
+            connection.execute("DELETE FROM pending_writes WHERE name = ? AND version = ?", (collection, version))
+            self._bump(connection, collection, datetime.utcnow())
+        await self._write(end)
+
+    async def collection_version(self, collection):
+        def read(connection):
+            row = connection.execute("SELECT seq, updated_at, epoch FROM counters WHERE name = ?", (collection,)).fetchone()
+            pending = connection.execute("SELECT version, started_at FROM pending_writes WHERE name = ?", (collection,)).fetchall()
+            return row, {entry["version"]: _parse_time(entry["started_at"]) for entry in pending}
+
+        def create(connection):
+            # First look at this counter (or one from before epochs): give it one
+            return connection.execute(
+                "INSERT INTO counters (name, seq, epoch) VALUES (?, 0, ?) "
+                "ON CONFLICT (name) DO UPDATE SET epoch = coalesce(epoch, excluded.epoch) RETURNING seq, updated_at, epoch",
+                (collection, new_epoch()),
+            ).fetchone()
+        row, pending = await self._read(read, snapshot=True)
+        if row is None or row["epoch"] is None:
+            row = await self._write(create)
+        settled, stale = settled_version(row["seq"], pending)
+        if stale:
+            def forget(connection):
+                connection.executemany(
+                    "DELETE FROM pending_writes WHERE name = ? AND version = ?",
+                    [(collection, version) for version in stale],
+                )
+            await self._write(forget)
+        return {
+            "_id": collection, "seq": row["seq"], "updated_at": _parse_time(row["updated_at"]),
+            "settled": settled, "epoch": row["epoch"],
+        }
+
+    # Documents
+
+    def _fetch(self, connection, collection, projection, where="", params=(), order="", limit=0, skip=0):
+        select, columns, with_list = _select(collection, projection)
+        sql = f"SELECT {select} FROM {collection} AS d"
+        if where:
+            sql += f" WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        if limit or skip:
+            sql += " LIMIT ? OFFSET ?"
+            params = (*params, limit or -1, skip)
+        list_field = LIST_FIELDS[collection][0]
+        docs = []
+        for row in connection.execute(sql, params):
+            doc = {"_id": ObjectId(row["id"])}
+            for name in columns:
+                if row[name] is not None:
+                    doc[name] = _from_column(name, row[name])
+            if with_list:
+                doc[list_field] = json.loads(row["list_values"])
+            docs.append(doc)
+        return docs
+
+    def _find_page(self, connection, collection, filters, projection, skip, limit, after):
+        conditions, params = _where(collection, filters)
+        if after is not None:
+            created_at, last_id = after
+            conditions.append("(d.created_at, d.id) < (?, ?)")
+            params += [_time(created_at), str(last_id)]
+        return self._fetch(
+            connection, collection, projection, " AND ".join(conditions), params,
+            "d.created_at DESC, d.id DESC", limit, skip,
+        )
+
+    async def find_page(self, collection, filters, projection=None, skip=0, limit=0, after=None):
+        return await self._read(self._find_page, collection, filters, projection, skip, limit, after)
+
+    async def count(self, collection, filters):
+        def count(connection):
+            conditions, params = _where(collection, filters)
+            sql = f"SELECT COUNT(*) FROM {collection} AS d"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            return connection.execute(sql, params).fetchone()[0]
+        return await self._read(count)
+
+    def _get_many(self, connection, collection, doc_ids, projection):
+        ids = [str(doc_id) for doc_id in doc_ids]
+        docs = []
+        for start in range(0, len(ids), ID_BATCH):
+            batch = ids[start:start + ID_BATCH]
+            where = f"d.id IN ({', '.join('?' * len(batch))})"
+            docs += self._fetch(connection, collection, projection, where, batch)
+        return docs
+
+    async def get(self, collection, doc_id, projection=None):
+        docs = await self._read(self._fetch, collection, projection, "d.id = ?", (str(doc_id),))
+        return docs[0] if docs else None
+
+    async def get_many(self, collection, doc_ids, projection=None):
+        return await self._read(self._get_many, collection, list(doc_ids), projection)
+
+    async def changed_since(self, collection, version, projection=None):
+        return await self._read(self._fetch, collection, projection, "d.version > ?", (version,), "d.version")
+
+    async def find_stale_renders(self, renderer_version):
+        return await self._read(
+            self._fetch, "blog_posts", {"content": 1},
+            "d.renderer_version IS NULL OR d.renderer_version != ?", (renderer_version,),
+        )
+
+    def _set_list(self, connection, collection, doc_id, values):
+        _, table, owner, value = LIST_FIELDS[collection]
+        connection.execute(f"DELETE FROM {table} WHERE {owner} = ?", (doc_id,))
+        connection.executemany(
+            f"INSERT INTO {table} ({owner}, {value}, position) VALUES (?, ?, ?)",
+            [(doc_id, item, position) for position, item in enumerate(_distinct(values))],
+        )
+
+    def _insert(self, connection, collection, docs):
+        columns = COLUMNS[collection]
+        list_field = LIST_FIELDS[collection][0]
+        sql = f"INSERT INTO {collection} (id, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))})"
+        ids = []
+        for doc in docs:
+            doc_id = doc.get("_id") or ObjectId()
+            connection.execute(sql, [str(doc_id)] + [_to_column(name, doc.get(name)) for name in columns])
+            self._set_list(connection, collection, str(doc_id), doc.get(list_field))
+            ids.append(doc_id)
+        return ids
+
+    async def insert(self, collection, doc):
+        return (await self._write(self._insert, collection, [doc]))[0]
+
+    async def insert_many(self, collection, docs):
+        return await self._write(self._insert, collection, list(docs))
+
+    def _apply(self, connection, collection, doc_id, fields):
+        list_field = LIST_FIELDS[collection][0]
+        columns = [name for name in fields if name in COLUMNS[collection]]
+        unknown = set(fields) - set(columns) - {list_field}
+        if unknown:
+            raise ValueError(f"Unknown {collection} fields: {', '.join(sorted(unknown))}")
+        if columns:
+            connection.execute(
+                f"UPDATE {collection} SET {', '.join(f'{name} = ?' for name in columns)} WHERE id = ?",
+                [_to_column(name, fields[name]) for name in columns] + [doc_id],
+            )
+        if list_field in fields:
+            self._set_list(connection, collection, doc_id, fields[list_field])
+
+    def _update(self, connection, collection, doc_id, fields):
+        old = self._fetch(connection, collection, None, "d.id = ?", (str(doc_id),))
+        if not old:
+            return None
+        self._apply(connection, collection, str(doc_id), fields)
+        return old[0]
+
+    async def update(self, collection, doc_id, fields):
+        return await self._write(self._update, collection, doc_id, fields)
+
+    def _delete(self, connection, collection, doc_id):
+        old = self._fetch(connection, collection, None, "d.id = ?", (str(doc_id),))
+        if not old:
+            return None
+        # Side-table rows go with it (ON DELETE CASCADE)
+        connection.execute(f"DELETE FROM {collection} WHERE id = ?", (str(doc_id),))
+        return old[0]
+
+    async def delete(self, collection, doc_id):
+        return await self._write(self._delete, collection, doc_id)
+
+    def _bulk_write(self, connection, collection, operations, version, ordered):
+        failed, missing = {}, set()
+        for index, (action, doc_id, fields) in enumerate(operations):
+            if connection.execute(f"SELECT 1 FROM {collection} WHERE id = ?", (str(doc_id),)).fetchone() is None:
+                missing.add(index)
+                continue
+            connection.execute("SAVEPOINT operation")
+            try:
+                if action == "delete":
+                    connection.execute(f"DELETE FROM {collection} WHERE id = ?", (str(doc_id),))
+                else:
+                    self._apply(connection, collection, str(doc_id), dict(fields, version=version))
+            except (sqlite3.Error, ValueError) as exc:
+                connection.execute("ROLLBACK TO operation")
+                failed[index] = str(exc)
+                if ordered:
+                    connection.execute("RELEASE operation")
+                    break
+            connection.execute("RELEASE operation")
+        return failed, missing
+
+    async def bulk_write(self, collection, operations, version, ordered=True):
+        # One transaction, so nothing can delete a document between the check and the write
+        if not operations:
+            return {}, set()
+        return await self._write(self._bulk_write, collection, list(operations), version, ordered)
+
+    def _post_overview(self, connection, published_only, recent, projection):
+        where = " WHERE published = 1" if published_only else ""
+        status = {
+            bool(row[0]): row[1]
+            for row in connection.execute(f"SELECT published, COUNT(*) FROM blog_posts{where} GROUP BY published")
+        }
+        categories = [
+            {"name": row[0], "count": row[1]}
+            for row in connection.execute(
+                f"SELECT category, COUNT(*) AS count FROM blog_posts{where} GROUP BY category ORDER BY count DESC, category"
+            )
+        ]
+        tags = [
+            {"name": row[0], "count": row[1]}
+            for row in connection.execute(
+                "SELECT t.tag, COUNT(*) AS count FROM blog_post_tags AS t JOIN blog_posts AS p ON p.id = t.post_id"
+                + (" WHERE p.published = 1" if published_only else "")
+                + " GROUP BY t.tag ORDER BY count DESC, t.tag"
+            )
+        ]
+        filters = {"published": True} if published_only else {}
+        docs = self._find_page(connection, "blog_posts", filters, projection, 0, recent, None)
+        return {"recent": docs, "status": status, "categories": categories, "tags": tags}
+
+    async def post_overview(self, published_only, recent, projection):
+        return await self._read(self._post_overview, published_only, recent, projection, snapshot=True)
+
+    def _project_overview(self, connection, recent, projection):
+        status = {
+            bool(row[0]): row[1]
+            for row in connection.execute("SELECT featured, COUNT(*) FROM ai_projects GROUP BY featured")
+        }
+        return {
+            "recent": self._find_page(connection, "ai_projects", {}, projection, 0, recent, None),
+            "featured": self._find_page(connection, "ai_projects", {"featured": True}, projection, 0, recent, None),
+            "status": status,
+        }
+
+    async def project_overview(self, recent, projection):
+        return await self._read(self._project_overview, recent, projection, snapshot=True)
+
+    # Tombstones
+
+    async def record_tombstones(self, collection, doc_ids, version, deleted_at):
+        def record(connection):
+            connection.executemany(
+                "INSERT INTO tombstones (collection, doc_id, version, deleted_at) VALUES (?, ?, ?, ?)",
+                [(collection, str(doc_id), version, _time(deleted_at)) for doc_id in doc_ids],
+            )
+            # No TTL index here: expire old tombstones as new ones are written
+            cutoff = datetime.utcnow() - timedelta(days=TOMBSTONE_TTL_DAYS)
+            connection.execute("DELETE FROM tombstones WHERE deleted_at < ?", (_time(cutoff),))
+        await self._write(record)
+
+    async def deleted_since(self, collection, version):
+        def read(connection):
+            return connection.execute(
+                "SELECT doc_id FROM tombstones WHERE collection = ? AND version > ?", (collection, version)
+            ).fetchall()
+        return [ObjectId(row[0]) for row in await self._read(read)]
+
+    # Search postings
+
+    async def add_postings(self, postings):
+        def add(connection):
+            connection.executemany(
+                "INSERT OR REPLACE INTO search_terms (term, post_id, weight, published) VALUES (?, ?, ?, ?)",
+                [(p["term"], str(p["post_id"]), p["weight"], int(bool(p["published"]))) for p in postings],
+            )
+        if postings:
+            await self._write(add)
+
+    async def remove_postings(self, post_id=None):
+        def remove(connection):
+            if post_id is None:
+                connection.execute("DELETE FROM search_terms")
+            else:
+                connection.execute("DELETE FROM search_terms WHERE post_id = ?", (str(post_id),))
+        await self._write(remove)
+
+    async def find_postings(self, prefixes, published_only):
+        def find(connection):
+            sql = "SELECT term, post_id, weight FROM search_terms WHERE term >= ? AND term < ?"
+            if published_only:
+                sql += " AND published = 1"
+            found = {}
+            for prefix in prefixes:
+                # Prefix match as a range scan on the (term, post_id) key
+                upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                for row in connection.execute(sql, (prefix, upper)):
+                    found[(row[0], row[1])] = row[2]
+            return found
+        found = await self._read(find, snapshot=len(prefixes) > 1)
+        return [{"term": term, "post_id": ObjectId(post_id), "weight": weight} for (term, post_id), weight in found.items()]
+
+    async def count_postings(self):
+        def count(connection):
+            return connection.execute("SELECT COUNT(*) FROM search_terms").fetchone()[0]
+        return await self._read(count)
+
+    # Taxonomy counters
+
+    async def increment_counts(self, increments):
+        def increment(connection):
+            connection.executemany(
+                "INSERT INTO taxonomy_counts (field, name, published, drafts) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (field, name) DO UPDATE SET "
+                "published = published + excluded.published, drafts = drafts + excluded.drafts",
+                [(field, name, inc.get("published", 0), inc.get("drafts", 0)) for (field, name), inc in increments.items()],
+            )
+        await self._write(increment)
+
+    async def get_counts(self, field, published_only):
+        def read(connection):
+            sql = "SELECT name, published, drafts FROM taxonomy_counts WHERE field = ?"
+            if published_only:
+                sql += " AND published > 0"
+            return connection.execute(sql, (field,)).fetchall()
+        return [dict(row) for row in await self._read(read)]
+
+    async def replace_counts(self, rows):
+        def replace(connection):
+            connection.execute("DELETE FROM taxonomy_counts")
+            connection.executemany(
+                "INSERT INTO taxonomy_counts (field, name, published, drafts) VALUES (?, ?, ?, ?)",
+                [(row["field"], row["name"], row.get("published", 0), row.get("drafts", 0)) for row in rows],
+            )
+        await self._write(replace)
+
+    async def count_taxonomy_counts(self):
+        def count(connection):
+            return connection.execute("SELECT COUNT(*) FROM taxonomy_counts").fetchone()[0]
+        return await self._read(count)
+
+    # Upload records
+
+    async def register_upload(self, record):
+        def register(connection):
+            connection.execute(
+                "INSERT OR IGNORE INTO uploads (digest, path, size, content_type, refs, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (record["_id"], record["path"], record["size"], record["content_type"], record.get("refs", 0),
+                 _time(record["created_at"])),
+            )
+        await self._write(register)
+
+    @staticmethod
+    def _upload(row):
+        return {
+            "_id": row["digest"], "path": row["path"], "size": row["size"], "content_type": row["content_type"],
+            "refs": row["refs"], "created_at": _parse_time(row["created_at"]),
+        }
+
+    async def get_upload(self, digest):
+        def read(connection):
+            return connection.execute("SELECT * FROM uploads WHERE digest = ?", (digest,)).fetchone()
+        row = await self._read(read)
+        return self._upload(row) if row is not None else None
+
+    async def adjust_upload_refs(self, deltas):
+        def adjust(connection):
+            connection.executemany(
+                "UPDATE uploads SET refs = refs + ? WHERE digest = ?",
+                [(delta, digest) for digest, delta in deltas.items() if delta],
+            )
+        if any(deltas.values()):
+            await self._write(adjust)
+
+    async def find_orphan_uploads(self, limit):
+        def read(connection):
+            return connection.execute("SELECT * FROM uploads WHERE refs <= 0 ORDER BY refs LIMIT ?", (limit or -1,)).fetchall()
+        return [self._upload(row) for row in await self._read(read)]
+
@@ -0,0 +1,166 @@
+import os
+import re
+import stat
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from images import MODERN_FORMATS, VARIANT_DIR
+
+# Browser cache lifetime (seconds) for uploads whose name is not a content
+# hash (files stored before uploads were content-addressed)
+UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', '3600'))
+# Chunk size when the app streams the file itself
+UPLOAD_SEND_CHUNK_SIZE = int(os.environ.get('UPLOAD_SEND_CHUNK_SIZE', str(256 * 1024)))
+
+# Let the reverse proxy send upload bytes with sendfile(2): "x-accel-redirect"
+# (nginx; UPLOAD_ACCEL_PREFIX is an internal location aliased to UPLOAD_DIR)
+# or "x-sendfile" (Apache mod_xsendfile, lighttpd). Unset, the app streams them.
+UPLOAD_SENDFILE = os.environ.get('UPLOAD_SENDFILE', '').lower()
+UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/internal-uploads/')
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Names derived from the content hash: originals (aa/bb/<sha256>.<ext>) and
+# their resized variants (variants/<sha256>[-<width>w].<ext>). Group 1 is
+# the digest, group 2 the width suffix of a resized variant (if any).
+_ORIGINAL_RE = re.compile(r"[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})()\.(?:jpg|png|gif|webp|avif)")
+_VARIANT_RE = re.compile(r"variants/([0-9a-f]{64})(-\d+w)?\.(?:jpg|png|webp|avif)")
+
+CONTENT_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+def accepted_types(accept):
+    """Media types listed explicitly in an Accept header with a non-zero q"""
+    types = set()
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = next((param[2:] for param in params if param.startswith("q=")), "1")
+        try:
+            if float(quality) > 0:
+                types.add(media_type.lower())
+        except ValueError:
+            continue
+    return types
+
+
+class UploadFileResponse(FileResponse):
+    """FileResponse that lets something outside Python send the bytes when configured to.
+
+    Zero-copy needs the front end's help. With UPLOAD_SENDFILE set, the
+    response is only headers plus X-Accel-Redirect or X-Sendfile, and the
+    reverse proxy sends the file itself. A server advertising the ASGI
+    pathsend extension is handed the path instead (the pinned uvicorn does
+    not advertise it). Otherwise, the default, the file is read and
+    streamed through Python in UPLOAD_SEND_CHUNK_SIZE chunks.
+    """
+
+    chunk_size = UPLOAD_SEND_CHUNK_SIZE
+
+    def __init__(self, path, root, **kwargs):
+        super().__init__(path, **kwargs)
+        self.root = root
+
+    async def __call__(self, scope, receive, send):
+        if self.send_header_only:
+            await super().__call__(scope, receive, send)
+        elif UPLOAD_SENDFILE in ("x-accel-redirect", "x-sendfile"):
+            await self.send_by_proxy(send)
+        elif "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+            if self.background is not None:
+                await self.background()
+        else:
+            await super().__call__(scope, receive, send)
+
+    async def send_by_proxy(self, send):
+        if UPLOAD_SENDFILE == "x-accel-redirect":
+            relative = os.path.relpath(self.path, self.root).replace(os.sep, "/")
+            target = UPLOAD_ACCEL_PREFIX.rstrip("/") + "/" + relative
+        else:
+            target = os.path.abspath(self.path)
+        # The proxy replaces the (empty) body with the file and sets its length
+        headers = [(name, value) for name, value in self.raw_headers if name != b"content-length"]
+        headers += [(b"content-length", b"0"), (UPLOAD_SENDFILE.encode(), target.encode())]
+        await send({"type": "http.response.start", "status": self.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+        if self.background is not None:
+            await self.background()
+
+
+class UploadStaticFiles(StaticFiles):
+    """Static mount for /uploads with a caching policy and image negotiation.
+
+    Content-addressed files never change under their name, so they are sent
+    with a one-year immutable Cache-Control; anything else gets
+    UPLOAD_CACHE_MAX_AGE and revalidates with ETag/Last-Modified. When the
+    client's Accept header lists image/avif or image/webp and the variant
+    worker has written a smaller full-size encoding in that format, the
+    request is answered with it instead (Vary: Accept). Temp files of
+    in-progress uploads (dot-names) are never served.
+    """
+
+    async def get_response(self, path, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        relative = path.replace(os.sep, "/")
+        if any(part.startswith(".") for part in relative.split("/")):
+            raise HTTPException(status_code=404)
+
+        match = _ORIGINAL_RE.fullmatch(relative) or _VARIANT_RE.fullmatch(relative)
+        if match is None:
+            response = await super().get_response(path, scope)
+            if response.status_code in (200, 304):
+                response.headers["cache-control"] = f"public, max-age={UPLOAD_CACHE_MAX_AGE}"
+            return response
+
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+
+        request_headers = Headers(scope=scope)
+        negotiated = await anyio.to_thread.run_sync(
+            self.negotiate, match.group(1), match.group(2) or "", stat_result.st_size,
+            accepted_types(request_headers.get("accept")),
+        )
+        media_type = None
+        if negotiated is not None:
+            full_path, stat_result, media_type = negotiated
+
+        response = UploadFileResponse(
+            full_path, self.directory, stat_result=stat_result, media_type=media_type, method=scope["method"],
+        )
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["vary"] = "Accept"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = UploadFileResponse(
+            full_path, self.directory, status_code=status_code, stat_result=stat_result, method=scope["method"],
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def negotiate(digest, suffix, size, accepted):
+        """Smallest acceptable modern encoding of the same image, as (path, stat, type), or None"""
+        best = None
+        for fmt in MODERN_FORMATS:
+            if CONTENT_TYPES[fmt] not in accepted:
+                continue
+            candidate = os.path.join(VARIANT_DIR, f"{digest}{suffix}.{fmt}")
+            try:
+                candidate_stat = os.stat(candidate)
+            except OSError:
+                continue
+            if candidate_stat.st_size < size and (best is None or candidate_stat.st_size < best[1].st_size):
+                best = (candidate, candidate_stat, CONTENT_TYPES[fmt])
+        return best
+
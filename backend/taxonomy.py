@@ -0,0 +1,88 @@
+import asyncio
+from collections import Counter
+
+from repository import repo
+
+# Post fields whose values are counted; list fields count each distinct value once
+TAXONOMY_FIELDS = ["category", "tags"]
+
+
+def _values(post, field):
+    value = post.get(field)
+    if isinstance(value, list):
+        return set(value)
+    return {value} if value else set()
+
+
+def count_deltas(old_post, new_post):
+    """Per-(field, name, status) count changes for a write turning old_post into new_post.
+
+    Either side may be None (create / delete). Status is "published" or
+    "drafts". Unchanged values cancel out, so an edit that only touches
+    the content produces no deltas.
+    """
+    deltas = Counter()
+    for post, sign in ((old_post, -1), (new_post, 1)):
+        if not post:
+            continue
+        status = "published" if post.get("published", True) else "drafts"
+        for field in TAXONOMY_FIELDS:
+            for name in _values(post, field):
+                deltas[(field, name, status)] += sign
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+async def apply_counts(old_post, new_post):
+    """Adjust the taxonomy_counts collection by the difference between two versions of a post"""
+    deltas = count_deltas(old_post, new_post)
+    if not deltas:
+        return
+    increments = {}
+    for (field, name, status), delta in deltas.items():
+        increments.setdefault((field, name), {})[status] = delta
+    await repo.increment_counts(increments)
+
+
+async def get_counts(field, published_only=False):
+    """[{"name", "count", "published", "drafts"}] for one field, most used first.
+
+    Reads only the counters, so the cost depends on the number of distinct
+    values, not the number of posts.
+    """
+    rows = await repo.get_counts(field, published_only)
+    counts = []
+    for row in rows:
+        published, drafts = row.get("published", 0), row.get("drafts", 0)
+        count = published if published_only else published + drafts
+        if count > 0:
+            counts.append({"name": row["name"], "count": count, "published": published, "drafts": drafts})
+    counts.sort(key=lambda row: (-row["count"], row["name"]))
+    return counts
+
+
+async def rebuild_counts():
+    """Recompute every counter from blog_posts, fixing any drift; returns the number of counters.
+
+    Counter updates made by writes while this runs can be lost, so run it
+    when the blog is idle (it is cheap to run again).
+    """
+    counts = Counter()
+    posts = await repo.find_page("blog_posts", {}, {"category": 1, "tags": 1, "published": 1})
+    for post in posts:
+        counts.update(count_deltas(None, post))
+    rows = {}
+    for (field, name, status), count in counts.items():
+        rows.setdefault((field, name), {"field": field, "name": name, "published": 0, "drafts": 0})[status] = count
+    await repo.replace_counts(list(rows.values()))
+    return len(rows)
+
+
+async def ensure_counts_built():
+    """Build the counters once when posts exist but nothing has been counted yet"""
+    if await repo.count_taxonomy_counts() == 0 and await repo.count("blog_posts", {}) > 0:
+        await rebuild_counts()
+
+
+if __name__ == "__main__":
+    # python taxonomy.py: rebuild the counters from the posts collection
+    print(f"Rebuilt {asyncio.run(rebuild_counts())} taxonomy counters")
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from datetime import datetime
+
+from repository import repo
+
+# Upload storage settings
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', 'uploads')
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(64 * 1024)))
+
+# Leading bytes of the image formats we accept -> (content type, extension)
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+]
+
+
+# Stored uploads: uploads/<2 hex>/<2 hex>/<sha256>.<ext>
+STORED_UPLOAD_RE = re.compile(r"/uploads/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def detect_image_type(head: bytes):
+    """Identify an image from its magic bytes; returns (content type, extension) or None"""
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "image/avif", "avif"
+    return None
+
+
+def stored_path(digest, extension):
+    """Path of an upload relative to UPLOAD_DIR, sharded by the first two hash bytes"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def _commit(temp_path, final_path):
+    """Move a finished temp file into place, or drop it if that content is already stored"""
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+        return False
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(temp_path, final_path)
+    return True
+
+
+async def save_upload(upload):
+    """Stream an UploadFile into content-addressed storage under UPLOAD_DIR.
+
+    The file is read in UPLOAD_CHUNK_SIZE chunks and hashed with SHA-256 as
+    it goes. The type is taken from the file's magic bytes (never the
+    client's content type or filename) and the size limit is enforced as
+    chunks arrive. Data goes to a hidden temp file and is only renamed into
+    its sharded, hash-named path once complete; if that content is already
+    stored the temp file is dropped and the existing path returned. File
+    I/O runs in worker threads so the event loop never blocks on disk.
+    """
+    head = await upload.read(UPLOAD_CHUNK_SIZE)
+    detected = detect_image_type(head)
+    if detected is None:
+        raise UnsupportedImage()
+    content_type, extension = detected
+
+    temp_path = os.path.join(UPLOAD_DIR, f".{uuid.uuid4().hex}.part")
+    hasher = hashlib.sha256()
+    size = 0
+    buffer = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > UPLOAD_MAX_BYTES:
+                raise UploadTooLarge()
+            hasher.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        await asyncio.to_thread(buffer.close)
+        digest = hasher.hexdigest()
+        path = stored_path(digest, extension)
+        created = await asyncio.to_thread(_commit, temp_path, os.path.join(UPLOAD_DIR, path))
+    except BaseException:
+        buffer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    await repo.register_upload({"_id": digest, "path": path, "size": size, "content_type": content_type,
+                                "refs": 0, "created_at": datetime.utcnow()})
+    return {"digest": digest, "path": path, "size": size, "content_type": content_type, "created": created}
+
+
+def referenced_uploads(doc):
+    """Digests of stored uploads a post or project points at (image fields and markdown)"""
+    if not doc:
+        return set()
+    text = " ".join(str(doc.get(field) or "") for field in ("featured_image", "image_url", "content"))
+    return set(STORED_UPLOAD_RE.findall(text))
+
+
+async def adjust_refs(old_doc, new_doc):
+    """Update upload reference counts for a write that turned old_doc into new_doc.
+
+    Either side may be None (create / delete). Only the difference between
+    the two sets of referenced uploads is written, in one bulk request.
+    """
+    old_refs = referenced_uploads(old_doc)
+    new_refs = referenced_uploads(new_doc)
+    deltas = {digest: 1 for digest in new_refs - old_refs}
+    deltas.update({digest: -1 for digest in old_refs - new_refs})
+    if deltas:
+        await repo.adjust_upload_refs(deltas)
+
+
+async def find_orphans(limit=100):
+    """Stored uploads no post or project references any more (served by the refs index)"""
+    return await repo.find_orphan_uploads(limit)
+
+
+class UploadSizeLimitMiddleware:
+    """Reject upload requests whose body is over the limit, declared or not.
+
+    Multipart bodies are spooled before the route runs, so this stops an
+    oversized upload before it is stored. A declared Content-Length over the
+    limit is refused before any of the body is read; otherwise (e.g. a
+    chunked request) the body is counted as it is received and refused as
+    soon as it runs past the limit.
+    """
+
+    # Allowance for multipart boundaries, part headers and the other form fields
+    FORM_OVERHEAD = 64 * 1024
+
+    def __init__(self, app, path="/api/upload", max_bytes=UPLOAD_MAX_BYTES):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        limit = self.max_bytes + self.FORM_OVERHEAD
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    await self.reject(send)
+                    return
+                break
+
+        received = 0
+        started = rejected = False
+
+        async def counting_receive():
+            # Past the limit: answer 413 now and tell the app the client went away
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    if not started:
+                        await self.reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app answers to the cut-off body comes after our 413
+            nonlocal started
+            if not rejected:
+                started = started or message["type"] == "http.response.start"
+                await send(message)
+
+        await self.app(scope, counting_receive, guarded_send)
+
+    @staticmethod
+    async def reject(send):
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"File too large"}'})
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Offline Test Suite for the Storage Repositories
+Runs the same CRUD, cursor paging, bulk, changes/tombstones and taxonomy
+checks against MongoRepository (on mongomock) and SQLiteRepository (on a
+temporary file), so the two backends are held to one behaviour
+
+    pip install -r backend/requirements-bench.txt
+    python backend_repository_test.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import mongomock
+import pymongo
+from bson import ObjectId
+
+# The Mongo backend runs on mongomock; nothing here needs a server
+pymongo.MongoClient = mongomock.MongoClient
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import repository  # noqa: E402,F401  (imported first, as server.py does: it builds the default repository)
+from mongo_repository import MongoRepository  # noqa: E402
+from sqlite_repository import SQLiteRepository  # noqa: E402
+
+# Whole milliseconds: the precision both backends store datetimes at
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_post(title, tags, published=True, minutes=0, category="Testing"):
+    created_at = BASE_TIME + timedelta(minutes=minutes)
+    return {
+        "title": title,
+        "content": f"Content of {title}",
+        "excerpt": f"Excerpt of {title}",
+        "tags": tags,
+        "category": category,
+        "published": published,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "version": 0,
+    }
+
+
+def newest_first(docs):
+    return sorted(docs, key=lambda doc: (doc["created_at"], doc["_id"]), reverse=True)
+
+
+class RepositoryTester:
+    def __init__(self, repo):
+        self.repo = repo
+        self.test_results = []
+
+    def log_test(self, test_name, passed, details=""):
+        """Log test results"""
+        status = "✅ PASS" if passed else "❌ FAIL"
+        name = f"[{self.repo.name}] {test_name}"
+        self.test_results.append(f"{status}: {name}")
+        if details:
+            self.test_results.append(f"   Details: {details}")
+        print(f"{status}: {name}")
+        if details:
+            print(f"   Details: {details}")
+
+    async def test_crud(self):
+        """Test insert, get (whole and projected), get_many, count, update and delete"""
+        repo = self.repo
+        try:
+            post = make_post("CRUD post", ["crud", "python"])
+            post_id = await repo.insert("blog_posts", post)
+            other_id = await repo.insert("blog_posts", make_post("CRUD draft", ["crud"], published=False, minutes=1))
+
+            stored = await repo.get("blog_posts", post_id)
+            read_ok = stored is not None and stored["_id"] == post_id and all(stored[name] == value for name, value in post.items())
+
+            included = await repo.get("blog_posts", post_id, {"title": 1})
+            excluded = await repo.get("blog_posts", post_id, {"content": 0})
+            projection_ok = set(included) == {"_id", "title"} and "content" not in excluded and excluded["tags"] == ["crud", "python"]
+
+            many = await repo.get_many("blog_posts", [post_id, other_id, ObjectId()])
+            many_ok = sorted(doc["_id"] for doc in many) == sorted([post_id, other_id])
+
+            count_ok = (
+                await repo.count("blog_posts", {"tags": "crud"}) == 2
+                and await repo.count("blog_posts", {"tags": "crud", "published": True}) == 1
+                and await repo.count("blog_posts", {"tags": "python"}) == 1
+            )
+
+            before = await repo.update("blog_posts", post_id, {"title": "CRUD renamed", "tags": ["crud"], "published": False})
+            after = await repo.get("blog_posts", post_id)
+            update_ok = (
+                before["title"] == "CRUD post" and before["tags"] == ["crud", "python"]
+                and after["title"] == "CRUD renamed" and after["tags"] == ["crud"] and after["published"] is False
+                and after["content"] == post["content"]
+                and await repo.count("blog_posts", {"tags": "python"}) == 0
+            )
+            missing_update_ok = await repo.update("blog_posts", ObjectId(), {"title": "Nobody"}) is None
+
+            deleted = await repo.delete("blog_posts", post_id)
+            delete_ok = (
+                deleted is not None and deleted["_id"] == post_id
+                and await repo.get("blog_posts", post_id) is None
+                and await repo.delete("blog_posts", post_id) is None
+                and await repo.count("blog_posts", {"tags": "crud"}) == 1
+            )
+            await repo.delete("blog_posts", other_id)
+
+            passed = read_ok and projection_ok and many_ok and count_ok and update_ok and missing_update_ok and delete_ok
+            self.log_test("CRUD", passed, f"Read: {read_ok}, Projection: {projection_ok}, Get many: {many_ok}, Count: {count_ok}, Update: {update_ok and missing_update_ok}, Delete: {delete_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("CRUD", False, f"Exception: {str(e)}")
+            return False
+
+    async def test_cursor_paging(self):
+        """Test walking find_page by (created_at, _id) keyset visits every post once, newest first, ties included"""
+        repo = self.repo
+        try:
+            # Pairs of posts share a created_at, so the _id tie-break is exercised
+            posts = [make_post(f"Page post {i}", ["paging"], published=i % 3 != 0, minutes=i // 2) for i in range(11)]
+            ids = await repo.insert_many("blog_posts", posts)
+            expected = [doc["_id"] for doc in newest_first([dict(post, _id=post_id) for post, post_id in zip(posts, ids)])]
+
+            results = {}
+            for published_only in (False, True):
+                filters = {"tags": "paging", "published": True} if published_only else {"tags": "paging"}
+                walked, after, pages = [], None, 0
+                while True:
+                    page = await repo.find_page("blog_posts", filters, {"title": 1, "created_at": 1}, limit=3, after=after)
+                    walked.extend(doc["_id"] for doc in page)
+                    pages += 1
+                    if len(page) < 3:
+                        break
+                    after = (page[-1]["created_at"], page[-1]["_id"])
+                wanted = [post_id for post_id in expected if not published_only or posts[ids.index(post_id)]["published"]]
+                skipped = [doc["_id"] for doc in await repo.find_page("blog_posts", filters, None, skip=3, limit=3)]
+                results[published_only] = walked == wanted and skipped == wanted[3:6] and pages == len(wanted) // 3 + 1
+
+            for post_id in ids:
+                await repo.delete("blog_posts", post_id)
+
+            passed = results[False] and results[True]
+            self.log_test("Cursor Paging", passed, f"All posts: {results[False]}, Published only: {results[True]}")
+            return passed
+        except Exception as e:
+            self.log_test("Cursor Paging", False, f"Exception: {str(e)}")
+            return False
+
+    async def test_bulk_write(self):
+        """Test bulk_write applies sets (including list fields) and deletes in one call, ordered and unordered, reporting gone documents"""
+        repo = self.repo
+        try:
+            ids = await repo.insert_many("blog_posts", [make_post(f"Bulk post {i}", ["bulk"], minutes=i) for i in range(4)])
+
+            result = await repo.bulk_write("blog_posts", [
+                ("set", ids[0], {"title": "Bulk renamed", "tags": ["bulk", "renamed"]}),
+                ("delete", ids[1], None),
+            ], 7)
+            renamed = await repo.get("blog_posts", ids[0])
+            ordered_ok = (
+                result == ({}, set())
+                and renamed["title"] == "Bulk renamed" and renamed["tags"] == ["bulk", "renamed"]
+                and renamed["version"] == 7
+                and await repo.get("blog_posts", ids[1]) is None
+            )
+
+            result = await repo.bulk_write("blog_posts", [
+                ("set", ids[2], {"published": False}),
+                ("delete", ids[3], None),
+            ], 8, ordered=False)
+            unordered_ok = (
+                result == ({}, set())
+                and (await repo.get("blog_posts", ids[2]))["published"] is False
+                and await repo.get("blog_posts", ids[3]) is None
+                and await repo.count("blog_posts", {"tags": "bulk"}) == 2
+                and await repo.count("blog_posts", {"tags": "renamed"}) == 1
+            )
+            empty_ok = await repo.bulk_write("blog_posts", [], 9) == ({}, set())
+
+            # Documents already deleted (ids[1], ids[3]) are reported, not counted as written
+            result = await repo.bulk_write("blog_posts", [
+                ("delete", ids[1], None),
+                ("set", ids[2], {"title": "Bulk kept"}),
+                ("set", ids[3], {"title": "Bulk ghost"}),
+            ], 10)
+            missing_ok = (
+                result == ({}, {0, 2})
+                and (await repo.get("blog_posts", ids[2]))["title"] == "Bulk kept"
+                and await repo.get("blog_posts", ids[3]) is None
+            )
+
+            for post_id in ids:
+                await repo.delete("blog_posts", post_id)
+
+            passed = ordered_ok and unordered_ok and empty_ok and missing_ok
+            self.log_test("Bulk Write", passed, f"Ordered: {ordered_ok}, Unordered: {unordered_ok}, Empty batch: {empty_ok}, Missing documents: {missing_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Bulk Write", False, f"Exception: {str(e)}")
+            return False
+
+    async def test_changes_and_tombstones(self):
+        """Test version stamps, changed_since, deleted_since and the settled version while a write is in flight"""
+        repo = self.repo
+        try:
+            start = await repo.collection_version("blog_posts")
+
+            version = await repo.begin_write("blog_posts")
+            pending = await repo.collection_version("blog_posts")
+            post_id = await repo.insert("blog_posts", dict(make_post("Changed post", ["changes"]), version=version))
+            await repo.end_write("blog_posts", version)
+            settled = await repo.collection_version("blog_posts")
+            version_ok = (
+                version == start["seq"] + 1
+                and pending["seq"] == version and pending["settled"] == version - 1
+                and settled["seq"] > version and settled["settled"] == settled["seq"]
+                and settled["updated_at"] is not None
+                and bool(start["epoch"]) and pending["epoch"] == settled["epoch"] == start["epoch"]
+            )
+
+            changed_ok = (
+                [doc["_id"] for doc in await repo.changed_since("blog_posts", version - 1)] == [post_id]
+                and await repo.changed_since("blog_posts", version) == []
+                and [set(doc) for doc in await repo.changed_since("blog_posts", version - 1, {"title": 1})] == [{"_id", "title"}]
+            )
+
+            delete_version = await repo.begin_write("blog_posts")
+            await repo.delete("blog_posts", post_id)
+            await repo.record_tombstones("blog_posts", [post_id], delete_version, datetime.utcnow())
+            await repo.end_write("blog_posts", delete_version)
+            tombstone_ok = (
+                await repo.deleted_since("blog_posts", delete_version - 1) == [post_id]
+                and await repo.deleted_since("blog_posts", delete_version) == []
+                and await repo.deleted_since("ai_projects", 0) == []
+                and await repo.changed_since("blog_posts", version - 1) == []
+            )
+
+            passed = version_ok and changed_ok and tombstone_ok
+            self.log_test("Changes and Tombstones", passed, f"Versions: {version_ok}, Changed since: {changed_ok}, Deleted since: {tombstone_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Changes and Tombstones", False, f"Exception: {str(e)}")
+            return False
+
+    async def test_taxonomy(self):
+        """Test taxonomy counters (increment, filter, replace) and the per-post tallies of post_overview"""
+        repo = self.repo
+        try:
+            await repo.replace_counts([])
+            await repo.increment_counts({
+                ("tags", "ai"): {"published": 1, "drafts": 0},
+                ("tags", "draft-only"): {"published": 0, "drafts": 1},
+                ("category", "Research"): {"published": 1, "drafts": 1},
+            })
+            await repo.increment_counts({
+                ("tags", "ai"): {"published": 1, "drafts": 0},
+                ("category", "Research"): {"published": -1, "drafts": 0},
+            })
+            tags = sorted((row["name"], row["published"], row["drafts"]) for row in await repo.get_counts("tags", False))
+            published_tags = [row["name"] for row in await repo.get_counts("tags", True)]
+            categories = [(row["name"], row["published"], row["drafts"]) for row in await repo.get_counts("category", False)]
+            counters_ok = (
+                tags == [("ai", 2, 0), ("draft-only", 0, 1)]
+                and published_tags == ["ai"]
+                and categories == [("Research", 0, 1)]
+                and await repo.get_counts("category", True) == []
+                and await repo.count_taxonomy_counts() == 3
+            )
+
+            await repo.replace_counts([{"field": "tags", "name": "rebuilt", "published": 3, "drafts": 1}])
+            replace_ok = (
+                [(row["name"], row["published"], row["drafts"]) for row in await repo.get_counts("tags", False)] == [("rebuilt", 3, 1)]
+                and await repo.count_taxonomy_counts() == 1
+            )
+            await repo.replace_counts([])
+
+            ids = await repo.insert_many("blog_posts", [
+                make_post("Overview one", ["ml", "python"], minutes=1, category="AI"),
+                make_post("Overview two", ["ml"], minutes=2, category="AI"),
+                make_post("Overview draft", ["ml"], published=False, minutes=3, category="Notes"),
+            ])
+            overview = await repo.post_overview(False, 2, {"content": 0})
+            published = await repo.post_overview(True, 5, {"content": 0})
+            overview_ok = (
+                [doc["_id"] for doc in overview["recent"]] == [ids[2], ids[1]]
+                and "content" not in overview["recent"][0]
+                and overview["status"] == {True: 2, False: 1}
+                and overview["categories"] == [{"name": "AI", "count": 2}, {"name": "Notes", "count": 1}]
+                and overview["tags"] == [{"name": "ml", "count": 3}, {"name": "python", "count": 1}]
+                and published["status"] == {True: 2}
+                and published["tags"] == [{"name": "ml", "count": 2}, {"name": "python", "count": 1}]
+            )
+            for post_id in ids:
+                await repo.delete("blog_posts", post_id)
+
+            passed = counters_ok and replace_ok and overview_ok
+            self.log_test("Taxonomy", passed, f"Counters: {counters_ok}, Replace: {replace_ok}, Post overview: {overview_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Taxonomy", False, f"Exception: {str(e)}")
+            return False
+
+    async def run_all_tests(self):
+        """Run every check against this tester's repository"""
+        await self.repo.setup()
+        tests = [
+            self.test_crud,
+            self.test_cursor_paging,
+            self.test_bulk_write,
+            self.test_changes_and_tombstones,
+            self.test_taxonomy
+        ]
+
+        passed_tests = 0
+        for test in tests:
+            if await test():
+                passed_tests += 1
+            print("-" * 40)
+        await self.repo.close()
+        return passed_tests, len(tests)
+
+async def run_all_backends(directory):
+    """Run the suite against each backend in turn"""
+    passed_tests, total_tests, results = 0, 0, []
+    for repo in (MongoRepository(), SQLiteRepository(os.path.join(directory, "repository_test.db"))):
+        tester = RepositoryTester(repo)
+        passed, total = await tester.run_all_tests()
+        passed_tests += passed
+        total_tests += total
+        results.extend(tester.test_results)
+    return passed_tests, total_tests, results
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("STORAGE REPOSITORY TESTING (MONGO ON MONGOMOCK, SQLITE)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        passed, total, results = asyncio.run(run_all_backends(directory))
+
+    print("=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for result in results:
+        print(result)
+    print("=" * 60)
+    print(f"TOTAL: {passed}/{total} tests passed")
+    print("=" * 60)
+
+    # Exit with appropriate code
+    if passed == total:
+        print("🎉 ALL TESTS PASSED!")
+        exit(0)
+    else:
+        print(f"⚠️  {total - passed} TESTS FAILED!")
+        exit(1)
@@ -2,11 +2,17 @@
 """
 Backend Test Suite for Blog Application Secret Key Authentication System
 Tests all authentication endpoints and protected/public routes
+
+    python backend_test.py               # against BACKEND_URL
+    python backend_test.py --in-process  # against backend/server.py in this process (needs backend/requirements-bench.txt)
 """
 
+import asyncio
 import requests
 import json
 import os
+import sys
+import tempfile
 from datetime import datetime
 
 # Get backend URL from frontend .env
@@ -433,6 +439,165 @@ class BlogAPITester:
             self.log_test("GET Individual Post", False, f"Exception: {str(e)}")
             return False
     
+    def test_index_report(self):
+        """Test /api/admin/indexes accepts the valid secret and rejects an invalid one"""
+        try:
+            response = requests.get(f"{self.base_url}/admin/indexes", params={"blog_secret": self.valid_secret}, timeout=10)
+            valid_ok = response.status_code == 200 and "collections" in response.json()
+            
+            response = requests.get(f"{self.base_url}/admin/indexes", params={"blog_secret": self.invalid_secret}, timeout=10)
+            invalid_ok = response.status_code == 401
+            
+            passed = valid_ok and invalid_ok
+            self.log_test("Index Report - Secret Check", passed, f"Valid: {valid_ok}, Invalid rejected: {invalid_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Index Report - Secret Check", False, f"Exception: {str(e)}")
+            return False
+    
+    def test_search_index(self):
+        """Test /api/search finds a new post and drops it once the post is deleted"""
+        payload = {
+            "title": "Searchable Quasarwidget Post",
+            "content": "Testing the search index",
+            "excerpt": "Search test",
+            "tags": ["test"],
+            "category": "Testing",
+            "blog_secret": self.valid_secret
+        }
+        
+        try:
+            response = requests.post(f"{self.base_url}/posts", json=payload, timeout=10)
+            if response.status_code != 200:
+                self.log_test("Search Index", False, "Could not create temp post for testing")
+                return False
+            temp_post_id = response.json().get("id")
+            
+            # Prefix query should match the new post
+            response = requests.get(f"{self.base_url}/search", params={"q": "quasarwid"}, timeout=10)
+            found = response.status_code == 200 and temp_post_id in [hit["id"] for hit in response.json()["results"]]
+            
+            params = {"blog_secret": self.valid_secret}
+            requests.delete(f"{self.base_url}/posts/{temp_post_id}", params=params, timeout=10)
+            
+            response = requests.get(f"{self.base_url}/search", params={"q": "quasarwid"}, timeout=10)
+            removed = response.status_code == 200 and temp_post_id not in [hit["id"] for hit in response.json()["results"]]
+            
+            passed = found and removed
+            self.log_test("Search Index", passed, f"Found after create: {found}, Removed after delete: {removed}")
+            return passed
+        except Exception as e:
+            self.log_test("Search Index", False, f"Exception: {str(e)}")
+            return False
+    
+    def test_bulk_posts(self):
+        """Test /api/posts/bulk rejects an invalid secret and a repeated id, and deletes a batch with a valid one"""
+        payload = {
+            "title": "Test Post for Bulk Operations",
+            "content": "Testing bulk operations",
+            "excerpt": "Bulk test",
+            "tags": ["test"],
+            "category": "Testing",
+            "blog_secret": self.valid_secret
+        }
+        
+        try:
+            post_ids = []
+            for _ in range(2):
+                response = requests.post(f"{self.base_url}/posts", json=payload, timeout=10)
+                if response.status_code != 200:
+                    self.log_test("Bulk Posts", False, "Could not create temp posts for testing")
+                    return False
+                post_ids.append(response.json().get("id"))
+            
+            operations = [{"id": post_id, "action": "delete"} for post_id in post_ids]
+            response = requests.post(f"{self.base_url}/posts/bulk", json={"operations": operations, "blog_secret": self.invalid_secret}, timeout=10)
+            invalid_rejected = response.status_code == 401
+            
+            repeated = [
+                {"id": post_ids[0], "action": "set", "fields": {"title": "Renamed in bulk"}},
+                {"id": post_ids[0], "action": "delete"},
+            ]
+            response = requests.post(f"{self.base_url}/posts/bulk", json={"operations": repeated, "ordered": False, "blog_secret": self.valid_secret}, timeout=10)
+            statuses = [result["status"] for result in response.json().get("results", [])] if response.status_code == 200 else []
+            repeat_rejected = statuses == ["updated", "invalid"]
+            
+            response = requests.post(f"{self.base_url}/posts/bulk", json={"operations": operations, "blog_secret": self.valid_secret}, timeout=10)
+            deleted = response.status_code == 200 and response.json().get("deleted") == len(post_ids)
+            
+            passed = invalid_rejected and repeat_rejected and deleted
+            self.log_test("Bulk Posts", passed, f"Invalid rejected: {invalid_rejected}, Repeated id rejected: {repeat_rejected}, Batch deleted: {deleted}")
+            return passed
+        except Exception as e:
+            self.log_test("Bulk Posts", False, f"Exception: {str(e)}")
+            return False
+    
+    def test_home_and_stats(self):
+        """Test /api/home and /api/admin/stats match the post list, newest first, after seeding a post and a draft"""
+        payload = {
+            "title": "Test Post for Home and Stats",
+            "content": "Testing home and stats",
+            "excerpt": "Home and stats test",
+            "tags": ["test"],
+            "category": "Testing",
+            "blog_secret": self.valid_secret
+        }
+        
+        try:
+            seeded = []
+            for published in (True, False):
+                response = requests.post(f"{self.base_url}/posts", json=dict(payload, published=published), timeout=10)
+                if response.status_code != 200:
+                    self.log_test("Home and Stats", False, "Could not create temp posts for testing")
+                    return False
+                seeded.append(response.json()["id"])
+            published_id, draft_id = seeded
+            
+            # The lists these endpoints summarize: their totals and newest-first ids
+            response = requests.get(f"{self.base_url}/posts", params={"limit": 3, "summary": True}, timeout=10)
+            published_total = int(response.headers["X-Total-Count"])
+            recent_published = [post["id"] for post in response.json()]
+            response = requests.get(f"{self.base_url}/posts", params={"limit": 5, "summary": True, "published_only": False}, timeout=10)
+            overall_total = int(response.headers["X-Total-Count"])
+            recent_all = [post["id"] for post in response.json()]
+            
+            response = requests.get(f"{self.base_url}/home", timeout=10)
+            home = response.json() if response.status_code == 200 else {}
+            home_recent = [post["id"] for post in home.get("recent_posts", [])]
+            home_ok = (
+                home.get("posts", {}).get("published") == published_total
+                and home_recent == recent_published
+                and home_recent[:1] == [published_id]
+                and draft_id not in home_recent
+            )
+            
+            response = requests.get(f"{self.base_url}/admin/stats", timeout=10)
+            stats = response.json()["posts"] if response.status_code == 200 else {}
+            stats_recent = [post["id"] for post in stats.get("recent", [])]
+            stats_ok = (
+                stats.get("total") == overall_total
+                and stats.get("published") == published_total
+                and stats.get("drafts") == overall_total - published_total
+                and stats_recent == recent_all
+                and stats_recent[:2] == [draft_id, published_id]
+            )
+            
+            # Out-of-range limits are rejected instead of reaching $limit
+            bounds_ok = all(
+                requests.get(f"{self.base_url}/{path}", params={"limit": limit}, timeout=10).status_code == 422
+                for path in ("home", "admin/stats") for limit in (0, -1, 1000)
+            )
+            
+            for post_id in seeded:
+                requests.delete(f"{self.base_url}/posts/{post_id}", params={"blog_secret": self.valid_secret}, timeout=10)
+            
+            passed = home_ok and stats_ok and bounds_ok
+            self.log_test("Home and Stats", passed, f"Home matches published posts: {home_ok}, Stats match all posts: {stats_ok}, Limits bounded: {bounds_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Home and Stats", False, f"Exception: {str(e)}")
+            return False
+    
     def run_all_tests(self):
         """Run all authentication tests"""
         print("=" * 60)
@@ -458,7 +623,11 @@ class BlogAPITester:
             self.test_get_individual_posts_projects,
             self.test_delete_with_invalid_secret,
             self.test_delete_post_valid_secret,
-            self.test_delete_project_valid_secret
+            self.test_delete_project_valid_secret,
+            self.test_index_report,
+            self.test_search_index,
+            self.test_bulk_posts,
+            self.test_home_and_stats
         ]
         
         passed_tests = 0
@@ -483,9 +652,361 @@ class BlogAPITester:
         
         return passed_tests, total_tests, self.test_results
 
+def load_app():
+    """Import server.py in-process, with the Mongo storage backend on mongomock"""
+    import mongomock
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+    os.environ["STORAGE_BACKEND"] = "mongo"
+    # Uploads and their variants go to a scratch directory (inherited by the image worker processes)
+    os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="backend-test-uploads-"))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    import server
+    return server
+
+def opaque_tag(etag):
+    return etag[2:] if etag and etag.startswith("W/") else etag
+
+class InProcessAPITester:
+    """Tests the API in-process through httpx's ASGITransport, no running server or database needed"""
+    
+    log_test = BlogAPITester.log_test
+    
+    def __init__(self):
+        self.test_results = []
+        self.server = None
+        self.client = None
+    
+    async def create_post(self, title, **fields):
+        payload = {
+            "title": title,
+            "content": f"Content of {title}",
+            "excerpt": "In-process test",
+            "tags": ["in-process"],
+            "category": "Testing",
+            "blog_secret": self.server.BLOG_SECRET,
+            **fields
+        }
+        response = await self.client.post("/posts", json=payload)
+        response.raise_for_status()
+        return response.json()
+    
+    async def create_project(self, title, **fields):
+        payload = {
+            "title": title,
+            "description": f"Description of {title}",
+            "content": f"Content of {title}",
+            "technologies": ["Python"],
+            "blog_secret": self.server.BLOG_SECRET,
+            **fields
+        }
+        response = await self.client.post("/projects", json=payload)
+        response.raise_for_status()
+        return response.json()
+    
+    async def walk_pages(self, path, params):
+        """Follow X-Next-Cursor from the first page to the last; returns (ids in order, X-Total-Count of each page)"""
+        ids, totals, cursor = [], [], None
+        while True:
+            response = await self.client.get(path, params=dict(params, cursor=cursor) if cursor else params)
+            response.raise_for_status()
+            ids.extend(item["id"] for item in response.json())
+            totals.append(int(response.headers["X-Total-Count"]))
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return ids, totals
+    
+    async def test_cursor_walk(self):
+        """Test following next cursors visits every post and project once, newest first"""
+        try:
+            # 7 posts in pages of 3 and 6 projects in pages of 2 (an exactly full last page)
+            posts = [await self.create_post(f"Cursor post {i}", tags=["cursor-walk"]) for i in range(7)]
+            projects = [await self.create_project(f"Cursor project {i}") for i in range(6)]
+            
+            post_ids, post_totals = await self.walk_pages("/posts", {"limit": 3, "tag": "cursor-walk"})
+            expected_posts = [post["id"] for post in reversed(posts)]
+            posts_ok = post_ids == expected_posts and set(post_totals) == {len(posts)}
+            
+            project_ids, project_totals = await self.walk_pages("/projects", {"limit": 2})
+            expected_projects = [project["id"] for project in reversed(projects)]
+            projects_ok = project_ids == expected_projects and set(project_totals) == {len(projects)}
+            
+            passed = posts_ok and projects_ok
+            self.log_test("Cursor Walk", passed, f"Posts: {len(post_ids)} of {len(posts)} in order: {posts_ok}, Projects: {len(project_ids)} of {len(projects)} in order: {projects_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Cursor Walk", False, f"Exception: {str(e)}")
+            return False
+    
+    async def revalidate(self, path, etag, params=None):
+        """Status and ETag of a conditional GET; ETags are compared weakly, as If-None-Match does (gzip marks them W/)"""
+        response = await self.client.get(path, params=params, headers={"If-None-Match": etag})
+        return response.status_code, opaque_tag(response.headers.get("ETag"))
+    
+    async def test_conditional_get(self):
+        """Test If-None-Match gets 304 until a write, then 200 with a new ETag, on a post and on the list"""
+        try:
+            post = await self.create_post("Conditional post")
+            detail, listing = f"/posts/{post['id']}", "/posts"
+            params = {"limit": 5}
+            
+            detail_etag = opaque_tag((await self.client.get(detail)).headers["ETag"])
+            list_etag = opaque_tag((await self.client.get(listing, params=params)).headers["ETag"])
+            before_ok = (
+                await self.revalidate(detail, detail_etag) == (304, detail_etag)
+                and await self.revalidate(listing, list_etag, params) == (304, list_etag)
+            )
+            
+            payload = {
+                "title": "Conditional post, edited",
+                "content": post["content"],
+                "excerpt": post["excerpt"],
+                "tags": post["tags"],
+                "category": post["category"],
+                "blog_secret": self.server.BLOG_SECRET
+            }
+            response = await self.client.put(detail, json=payload)
+            response.raise_for_status()
+            
+            status, new_detail_etag = await self.revalidate(detail, detail_etag)
+            list_status, new_list_etag = await self.revalidate(listing, list_etag, params)
+            after_ok = (
+                status == 200 and new_detail_etag not in (None, detail_etag)
+                and list_status == 200 and new_list_etag not in (None, list_etag)
+                and await self.revalidate(detail, new_detail_etag) == (304, new_detail_etag)
+                and (await self.client.get(detail)).json()["title"] == payload["title"]
+            )
+            
+            passed = before_ok and after_ok
+            self.log_test("Conditional GET", passed, f"304 before the write: {before_ok}, 200 with a new ETag after it: {after_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Conditional GET", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_coalesced_reads(self):
+        """Test N concurrent identical reads of an uncached post trigger exactly one repository load"""
+        repo = self.server.repo
+        readers = 20
+        loads = 0
+        load = repo.get
+        
+        async def counted_load(*args, **kwargs):
+            nonlocal loads
+            loads += 1
+            # Slow enough that every reader arrives while the first load is in flight
+            await asyncio.sleep(0.05)
+            return await load(*args, **kwargs)
+        
+        try:
+            post = await self.create_post("Coalesced post")
+            self.server.read_cache.clear()
+            coalesced = self.server.read_cache.stats()["coalesced"]
+            repo.get = counted_load
+            try:
+                responses = await asyncio.gather(*(self.client.get(f"/posts/{post['id']}") for _ in range(readers)))
+            finally:
+                del repo.get
+            
+            responses_ok = all(response.status_code == 200 for response in responses) and len({response.content for response in responses}) == 1
+            coalesced = self.server.read_cache.stats()["coalesced"] - coalesced
+            passed = responses_ok and loads == 1 and coalesced == readers - 1
+            self.log_test("Coalesced Reads", passed, f"Identical 200s: {responses_ok}, Repository loads: {loads} for {readers} readers, Coalesced: {coalesced}")
+            return passed
+        except Exception as e:
+            self.log_test("Coalesced Reads", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_detail_cache_canonical_id(self):
+        """Test a post read by an upper-case id is not served stale after an update or delete by the lower-case one"""
+        try:
+            post = await self.create_post("Canonical id post")
+            upper = f"/posts/{post['id'].upper()}"
+            cached_ok = (await self.client.get(upper)).json()["title"] == post["title"]
+            
+            payload = {
+                "title": "Canonical id post, edited",
+                "content": post["content"],
+                "excerpt": post["excerpt"],
+                "tags": post["tags"],
+                "category": post["category"],
+                "blog_secret": self.server.BLOG_SECRET
+            }
+            response = await self.client.put(f"/posts/{post['id']}", json=payload)
+            response.raise_for_status()
+            updated_ok = (await self.client.get(upper)).json()["title"] == payload["title"]
+            
+            response = await self.client.delete(f"/posts/{post['id']}", params={"blog_secret": self.server.BLOG_SECRET})
+            response.raise_for_status()
+            deleted_ok = (await self.client.get(upper)).status_code == 404
+            
+            passed = cached_ok and updated_ok and deleted_ok
+            self.log_test("Detail Cache Canonical Id", passed, f"Read: {cached_ok}, Fresh after update: {updated_ok}, Gone after delete: {deleted_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Detail Cache Canonical Id", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_failed_write_invalidates(self):
+        """Test a write that fails after committing the post still drops the cached list"""
+        taxonomy = self.server.taxonomy
+        apply_counts = taxonomy.apply_counts
+        
+        async def failing_counts(*args, **kwargs):
+            raise RuntimeError("taxonomy unavailable")
+        
+        try:
+            params = {"limit": 5, "tag": "failed-write"}
+            before = await self.client.get("/posts", params=params)
+            cached_ok = before.status_code == 200 and before.json() == []
+            
+            taxonomy.apply_counts = failing_counts
+            try:
+                await self.create_post("Failed write post", tags=["failed-write"])
+                failed_ok = False
+            except Exception:
+                failed_ok = True
+            finally:
+                taxonomy.apply_counts = apply_counts
+            
+            after = await self.client.get("/posts", params=params)
+            fresh_ok = [post["title"] for post in after.json()] == ["Failed write post"]
+            
+            passed = cached_ok and failed_ok and fresh_ok
+            self.log_test("Failed Write Invalidates", passed, f"Cached empty list: {cached_ok}, Write failed: {failed_ok}, List fresh after it: {fresh_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Failed Write Invalidates", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_bulk_concurrent_delete(self):
+        """Test a post deleted between a bulk request's read and its write is reported not_found, with no derived writes"""
+        repo = self.server.repo
+        bulk_write = repo.bulk_write
+        
+        try:
+            kept = await self.create_post("Bulk race kept", tags=["bulk-race"])
+            gone = await self.create_post("Bulk race gone", tags=["bulk-race"])
+            
+            async def delete_first(*args, **kwargs):
+                # Another request deletes the post after run_bulk has read it
+                response = await self.client.delete(f"/posts/{gone['id']}", params={"blog_secret": self.server.BLOG_SECRET})
+                response.raise_for_status()
+                return await bulk_write(*args, **kwargs)
+            
+            batch = {
+                "operations": [{"id": post["id"], "action": "set", "fields": {"published": False}} for post in (kept, gone)],
+                "ordered": False,
+                "blog_secret": self.server.BLOG_SECRET
+            }
+            repo.bulk_write = delete_first
+            try:
+                response = await self.client.post("/posts/bulk", json=batch)
+            finally:
+                del repo.bulk_write
+            response.raise_for_status()
+            result = response.json()
+            statuses = [item["status"] for item in result["results"]]
+            result_ok = statuses == ["updated", "not_found"] and result["updated"] == 1
+            
+            tags = (await self.client.get("/tags")).json()["counts"]
+            counts = [(row["published"], row["drafts"]) for row in tags if row["name"] == "bulk-race"]
+            counts_ok = counts == [(0, 1)]
+            gone_ok = (await self.client.get(f"/posts/{gone['id']}")).status_code == 404
+            
+            passed = result_ok and counts_ok and gone_ok
+            self.log_test("Bulk Concurrent Delete", passed, f"Statuses: {statuses}, Tag counts (published, drafts): {counts}, Post gone: {gone_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Bulk Concurrent Delete", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_failed_variants(self):
+        """Test an image the variant worker cannot decode is reported failed, retried while attempts remain, and not pending forever"""
+        images = self.server.images
+        attempts = images.IMAGE_VARIANT_ATTEMPTS
+        
+        async def variants(digest):
+            await asyncio.gather(*images._pending)
+            response = await self.client.get(f"/uploads/{digest}/variants")
+            return response.status_code, response.json()
+        
+        try:
+            # A PNG signature followed by bytes no decoder accepts
+            files = {"file": ("broken.png", b"\x89PNG\r\n\x1a\n" + os.urandom(64), "image/png")}
+            response = await self.client.post("/upload", files=files, data={"blog_secret": self.server.BLOG_SECRET})
+            response.raise_for_status()
+            digest = response.json()["variants"].split("/")[-2]
+            
+            images.IMAGE_VARIANT_ATTEMPTS = 1
+            status, body = await variants(digest)
+            failed_ok = status == 200 and body["status"] == "failed" and body["attempts"] == 1 and bool(body["error"])
+            
+            images.IMAGE_VARIANT_ATTEMPTS = 2
+            retry_status, retry_body = await variants(digest)
+            status, body = await variants(digest)
+            retried_ok = retry_status == 202 and retry_body["status"] == "pending" and body["status"] == "failed" and body["attempts"] == 2
+            
+            # A pending entry whose process died long ago is queued again
+            stale = dict(images.read_status(digest), status="pending", updated_at=0)
+            images._write_json(images.status_path(digest), stale)
+            status, body = await variants(digest)
+            stale_ok = (status, body["status"]) == (202, "pending") and images.read_status(digest)["updated_at"] > 0
+            await asyncio.gather(*images._pending)
+            
+            passed = failed_ok and retried_ok and stale_ok
+            self.log_test("Failed Variants", passed, f"Failed with error: {failed_ok}, Retried: {retried_ok}, Stale pending requeued: {stale_ok}")
+            return passed
+        except Exception as e:
+            self.log_test("Failed Variants", False, f"Exception: {str(e)}")
+            return False
+        finally:
+            images.IMAGE_VARIANT_ATTEMPTS = attempts
+    
+    async def run_all_tests(self):
+        """Run every in-process test against a fresh app"""
+        print("=" * 60)
+        print("BLOG APPLICATION BACKEND IN-PROCESS TESTING")
+        print("=" * 60)
+        
+        import httpx
+        self.server = load_app()
+        await self.server.startup_database()
+        tests = [
+            self.test_cursor_walk,
+            self.test_conditional_get,
+            self.test_coalesced_reads,
+            self.test_detail_cache_canonical_id,
+            self.test_failed_write_invalidates,
+            self.test_bulk_concurrent_delete,
+            self.test_failed_variants
+        ]
+        
+        passed_tests = 0
+        try:
+            transport = httpx.ASGITransport(app=self.server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver/api") as self.client:
+                for test in tests:
+                    if await test():
+                        passed_tests += 1
+                    print("-" * 40)
+        finally:
+            await self.server.shutdown_database()
+        
+        total_tests = len(tests)
+        print("=" * 60)
+        print(f"TOTAL: {passed_tests}/{total_tests} tests passed")
+        print("=" * 60)
+        return passed_tests, total_tests, self.test_results
+
 if __name__ == "__main__":
-    tester = BlogAPITester()
-    passed, total, results = tester.run_all_tests()
+    # --in-process: test the app in this process instead of the remote BACKEND_URL
+    if "--in-process" in sys.argv:
+        tester = InProcessAPITester()
+        passed, total, results = asyncio.run(tester.run_all_tests())
+    else:
+        tester = BlogAPITester()
+        passed, total, results = tester.run_all_tests()
     
     # Exit with appropriate code
     if passed == total:
@@ -25,29 +25,33 @@ function Blog() {
   const fetchPosts = async () => {
     try {
       setLoading(true);
-      let url = `${API_URL}/api/posts?published_only=true`;
+      let filteredPosts;
       
-      if (selectedCategory) {
-        url += `&category=${encodeURIComponent(selectedCategory)}`;
-      }
-      
-      const response = await axios.get(url);
-      let filteredPosts = response.data;
-      
-      // Filter by tag if selected
-      if (selectedTag) {
-        filteredPosts = filteredPosts.filter(post => 
-          post.tags.includes(selectedTag)
-        );
-      }
-      
-      // Filter by search term
       if (searchTerm) {
-        filteredPosts = filteredPosts.filter(post =>
-          post.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          post.excerpt.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          post.tags.some(tag => tag.toLowerCase().includes(searchTerm.toLowerCase()))
-        );
+        // Ranked server-side search over the whole corpus
+        const response = await axios.get(`${API_URL}/api/search`, {
+          params: { q: searchTerm, limit: 50 }
+        });
+        filteredPosts = response.data.results;
+        if (selectedCategory) {
+          filteredPosts = filteredPosts.filter(post => post.category === selectedCategory);
+        }
+        if (selectedTag) {
+          filteredPosts = filteredPosts.filter(post => post.tags.includes(selectedTag));
+        }
+      } else {
+        let url = `${API_URL}/api/posts?published_only=true&summary=true`;
+        
+        if (selectedCategory) {
+          url += `&category=${encodeURIComponent(selectedCategory)}`;
+        }
+        
+        if (selectedTag) {
+          url += `&tag=${encodeURIComponent(selectedTag)}`;
+        }
+        
+        const response = await axios.get(url);
+        filteredPosts = response.data;
       }
       
       setPosts(filteredPosts);
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { Calendar, Tag, ArrowLeft, Share2, Github, ExternalLink, Edit } from 'lucide-react';
+import { Calendar, Clock, Tag, ArrowLeft, Share2, Github, ExternalLink, Edit } from 'lucide-react';
 import ReactMarkdown from 'react-markdown';
 import { Prism as SyntaxHighlighter } from 'react-syntax-highlighter';
 import { vscDarkPlus } from 'react-syntax-highlighter/dist/esm/styles/prism';
@@ -30,7 +30,7 @@ function BlogPost() {
   const fetchPost = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_URL}/api/posts/${id}`);
+      const response = await axios.get(`${API_URL}/api/posts/${id}?rendered=true`);
       setPost(response.data);
     } catch (error) {
       console.error('Error fetching post:', error);
@@ -42,7 +42,7 @@ function BlogPost() {
 
   const fetchRelatedPosts = async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/posts?limit=3&category=${post.category}&published_only=true`);
+      const response = await axios.get(`${API_URL}/api/posts?limit=3&category=${post.category}&published_only=true&summary=true`);
       // Filter out current post
       const filtered = response.data.filter(p => p.id !== post.id);
       setRelatedPosts(filtered.slice(0, 3));
@@ -150,6 +150,12 @@ function BlogPost() {
                 <Calendar className="w-4 h-4 mr-2" />
                 {formatDate(post.created_at)}
               </div>
+              {post.reading_time && (
+                <div className="flex items-center text-gray-500">
+                  <Clock className="w-4 h-4 mr-2" />
+                  {post.reading_time} min read
+                </div>
+              )}
             </div>
 
             <h1 className="font-display text-3xl md:text-4xl lg:text-5xl font-bold text-gray-900 leading-tight">
@@ -198,63 +204,90 @@ function BlogPost() {
       {/* Content */}
       <article className="py-12">
         <div className="max-w-4xl mx-auto px-4 sm:px-6 lg:px-8">
-          <div className="prose prose-lg max-w-none">
-            <ReactMarkdown
-              remarkPlugins={[remarkGfm]}
-              rehypePlugins={[rehypeRaw]}
-              components={{
-                code: CodeBlock,
-                h1: ({ children }) => (
-                  <h1 className="text-3xl font-bold text-gray-900 mt-12 mb-6 first:mt-0">
-                    {children}
-                  </h1>
-                ),
-                h2: ({ children }) => (
-                  <h2 className="text-2xl font-bold text-gray-900 mt-10 mb-4">
-                    {children}
-                  </h2>
-                ),
-                h3: ({ children }) => (
-                  <h3 className="text-xl font-bold text-gray-900 mt-8 mb-3">
-                    {children}
-                  </h3>
-                ),
-                p: ({ children }) => (
-                  <p className="text-gray-700 leading-relaxed mb-6">
-                    {children}
-                  </p>
-                ),
-                a: ({ href, children }) => (
-                  <a
-                    href={href}
-                    target="_blank"
-                    rel="noopener noreferrer"
-                    className="text-primary-600 hover:text-primary-700 font-medium underline decoration-primary-200 hover:decoration-primary-300 transition-colors"
-                  >
-                    {children}
-                    <ExternalLink className="w-4 h-4 inline ml-1" />
-                  </a>
-                ),
-                blockquote: ({ children }) => (
-                  <blockquote className="border-l-4 border-primary-200 pl-6 py-2 my-6 bg-primary-50 italic text-gray-700">
-                    {children}
-                  </blockquote>
-                ),
-                ul: ({ children }) => (
-                  <ul className="list-disc list-inside space-y-2 my-6 text-gray-700">
-                    {children}
-                  </ul>
-                ),
-                ol: ({ children }) => (
-                  <ol className="list-decimal list-inside space-y-2 my-6 text-gray-700">
-                    {children}
-                  </ol>
-                ),
-              }}
-            >
-              {post.content}
-            </ReactMarkdown>
-          </div>
+          {post.toc && post.toc.length > 0 && (
+            <nav className="mb-10 p-6 bg-gray-50 rounded-lg border border-gray-200">
+              <h2 className="text-sm font-semibold text-gray-900 uppercase tracking-wide mb-3">Contents</h2>
+              <ul className="space-y-1">
+                {post.toc.flatMap(function flatten(entry) {
+                  return [entry, ...entry.children.flatMap(flatten)];
+                }).map((entry) => (
+                  <li key={entry.id} style={{ paddingLeft: `${(entry.level - 2) * 1}rem` }}>
+                    <a href={`#${entry.id}`} className="text-primary-600 hover:text-primary-700">
+                      {entry.title}
+                    </a>
+                  </li>
+                ))}
+              </ul>
+            </nav>
+          )}
+          {post.content_html ? (
+            <>
+              {/* Pre-rendered and sanitized by the backend; code uses Pygments classes */}
+              <link rel="stylesheet" href={`${API_URL}/api/highlight.css`} />
+              <div
+                className="prose prose-lg max-w-none"
+                dangerouslySetInnerHTML={{ __html: post.content_html }}
+              />
+            </>
+          ) : (
+            <div className="prose prose-lg max-w-none">
+              <ReactMarkdown
+                remarkPlugins={[remarkGfm]}
+                rehypePlugins={[rehypeRaw]}
+                components={{
+                  code: CodeBlock,
+                  h1: ({ children }) => (
+                    <h1 className="text-3xl font-bold text-gray-900 mt-12 mb-6 first:mt-0">
+                      {children}
+                    </h1>
+                  ),
+                  h2: ({ children }) => (
+                    <h2 className="text-2xl font-bold text-gray-900 mt-10 mb-4">
+                      {children}
+                    </h2>
+                  ),
+                  h3: ({ children }) => (
+                    <h3 className="text-xl font-bold text-gray-900 mt-8 mb-3">
+                      {children}
+                    </h3>
+                  ),
+                  p: ({ children }) => (
+                    <p className="text-gray-700 leading-relaxed mb-6">
+                      {children}
+                    </p>
+                  ),
+                  a: ({ href, children }) => (
+                    <a
+                      href={href}
+                      target="_blank"
+                      rel="noopener noreferrer"
+                      className="text-primary-600 hover:text-primary-700 font-medium underline decoration-primary-200 hover:decoration-primary-300 transition-colors"
+                    >
+                      {children}
+                      <ExternalLink className="w-4 h-4 inline ml-1" />
+                    </a>
+                  ),
+                  blockquote: ({ children }) => (
+                    <blockquote className="border-l-4 border-primary-200 pl-6 py-2 my-6 bg-primary-50 italic text-gray-700">
+                      {children}
+                    </blockquote>
+                  ),
+                  ul: ({ children }) => (
+                    <ul className="list-disc list-inside space-y-2 my-6 text-gray-700">
+                      {children}
+                    </ul>
+                  ),
+                  ol: ({ children }) => (
+                    <ol className="list-decimal list-inside space-y-2 my-6 text-gray-700">
+                      {children}
+                    </ol>
+                  ),
+                }}
+              >
+                {post.content}
+              </ReactMarkdown>
+            </div>
+          )}
         </div>
       </article>
 
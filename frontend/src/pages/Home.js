@@ -13,13 +13,10 @@ function Home() {
   useEffect(() => {
     const fetchFeaturedContent = async () => {
       try {
-        const [postsResponse, projectsResponse] = await Promise.all([
-          axios.get(`${API_URL}/api/posts?limit=3&published_only=true`),
-          axios.get(`${API_URL}/api/projects?limit=3&featured_only=true`)
-        ]);
+        const response = await axios.get(`${API_URL}/api/home?limit=3`);
         
-        setFeaturedPosts(postsResponse.data);
-        setFeaturedProjects(projectsResponse.data);
+        setFeaturedPosts(response.data.recent_posts);
+        setFeaturedProjects(response.data.featured_projects);
       } catch (error) {
         console.error('Error fetching featured content:', error);
       } finally {
@@ -42,7 +42,7 @@ function ProjectDetail() {
 
   const fetchRelatedProjects = async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/projects?limit=3`);
+      const response = await axios.get(`${API_URL}/api/projects?limit=3&summary=true`);
       // Filter out current project and get related ones
       const filtered = response.data.filter(p => p.id !== project.id);
       setRelatedProjects(filtered.slice(0, 3));
@@ -35,23 +35,18 @@ function AdminDashboard() {
   const fetchDashboardData = async () => {
     try {
       setLoading(true);
-      const [postsResponse, projectsResponse] = await Promise.all([
-        axios.get(`${API_URL}/api/posts?published_only=false&limit=50`),
-        axios.get(`${API_URL}/api/projects?limit=50`)
-      ]);
-
-      const allPosts = postsResponse.data;
-      const allProjects = projectsResponse.data;
+      const response = await axios.get(`${API_URL}/api/admin/stats?limit=5`);
+      const { posts, projects } = response.data;
 
       setStats({
-        totalPosts: allPosts.length,
-        publishedPosts: allPosts.filter(post => post.published).length,
-        totalProjects: allProjects.length,
-        featuredProjects: allProjects.filter(project => project.featured).length
+        totalPosts: posts.total,
+        publishedPosts: posts.published,
+        totalProjects: projects.total,
+        featuredProjects: projects.featured
       });
 
-      setRecentPosts(allPosts.slice(0, 5));
-      setRecentProjects(allProjects.slice(0, 5));
+      setRecentPosts(posts.recent);
+      setRecentProjects(projects.recent);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
       toast.error('Failed to load dashboard data');